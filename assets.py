@@ -0,0 +1,109 @@
+import os
+
+import pygame
+
+PAGE_SIZE = 1024
+
+
+class Atlas:
+    """Shelf-packed texture pages, images are handed out as subsurfaces."""
+
+    def __init__(self, page_size: int = PAGE_SIZE) -> None:
+        self.page_size = page_size
+        self.pages: list[pygame.Surface] = []
+        self.shelf_x = self.shelf_y = self.shelf_height = 0
+
+    def new_page(self) -> pygame.Surface:
+        page = pygame.Surface((self.page_size, self.page_size))
+        # convert() needs a display, without one pages keep the default format
+        if pygame.display.get_surface() is not None:
+            page = page.convert()
+
+        self.pages.append(page)
+        self.shelf_x = self.shelf_y = self.shelf_height = 0
+        return page
+
+    def reserve(self, width: int, height: int) -> pygame.Rect:
+        if width > self.page_size or height > self.page_size:
+            raise ValueError(f"{width}x{height} does not fit on an atlas page")
+
+        if not self.pages:
+            self.new_page()
+
+        # start a new shelf when the row is full, a new page when it's out of rows
+        if self.shelf_x + width > self.page_size:
+            self.shelf_x = 0
+            self.shelf_y += self.shelf_height
+            self.shelf_height = 0
+        if self.shelf_y + height > self.page_size:
+            self.new_page()
+
+        rect = pygame.Rect(self.shelf_x, self.shelf_y, width, height)
+        self.shelf_x += width
+        self.shelf_height = max(self.shelf_height, height)
+        return rect
+
+    def add(self, image: pygame.Surface, area: pygame.Rect = None) -> pygame.Surface:
+        area = pygame.Rect(area or image.get_rect())
+        rect = self.reserve(area.width, area.height)
+        page = self.pages[-1]
+        # copied in the page's format, so alpha is dropped just like convert()
+        page.blit(image.convert(page), rect, area)
+        return page.subsurface(rect)
+
+
+class Assets:
+    """Loads every image once and keeps the pixels in a shared atlas."""
+
+    def __init__(self, root: str = "images") -> None:
+        self.root = root
+        self.atlas = Atlas()
+        self.images: dict[tuple, pygame.Surface] = {}
+        self.sheets: dict[tuple, list[pygame.Surface]] = {}
+        self.loads = 0  # files decoded from disk
+
+    def read(self, file: str) -> pygame.Surface:
+        self.loads += 1
+        return pygame.image.load(os.path.join(self.root, f"{file}.png"))
+
+    def image(self, file: str, colorkey: pygame.Color = "#FFFFFF") -> pygame.Surface:
+        key = file, str(colorkey) if colorkey else None
+        if key not in self.images:
+            image = self.atlas.add(self.read(file))
+            set_colorkey(image, colorkey)
+            self.images[key] = image
+
+        return self.images[key]
+
+    def sheet(
+        self, file: str, sprite_size: tuple[int, int], colorkey: pygame.Color
+    ) -> list[pygame.Surface]:
+        # one row of equally sized sprites, each a separate atlas handle
+        key = file, tuple(sprite_size), str(colorkey) if colorkey else None
+        if key not in self.sheets:
+            sheet = self.read(file)
+            width, height = sprite_size
+
+            sprites = []
+            for i in range(sheet.get_width() // width):
+                area = pygame.Rect(i * width, 0, width, height)
+                sprite = self.atlas.add(sheet, area)
+                set_colorkey(sprite, colorkey)
+                sprites.append(sprite)
+            self.sheets[key] = sprites
+
+        return self.sheets[key]
+
+    def clear(self) -> None:
+        self.atlas = Atlas(self.atlas.page_size)
+        self.images.clear()
+        self.sheets.clear()
+
+
+def set_colorkey(image: pygame.Surface, colorkey: pygame.Color) -> None:
+    if colorkey:
+        image.set_colorkey(pygame.Color(colorkey), pygame.RLEACCEL)
+
+
+# shared by the level, the entities and utils.load_image
+assets = Assets()
@@ -1,17 +1,18 @@
 import random
+from collections import deque
 
-import pygame
 import settings as st
 from entity import Entity
 from level import Level
-from pathfinder import bfs
 from player import Player
+from scheduler import PATHFINDING, PathScheduler
 from utils import load_spritesheet
 
 
 class Bat(Entity):
-    def __init__(self, rect):
+    def __init__(self, rect, seed: int = None):
         super().__init__(rect, "bat")
+        self.rng = random.Random(seed)
 
         self.load_animations(
             [
@@ -60,6 +61,8 @@ class Bat(Entity):
         self.current_direction = None
 
         self.next_step = None
+        self.path: deque[tuple[int, int]] = deque()  # tiles after next_step
+        self.scheduler: PathScheduler = None  # replans right away without one
         self.remainder_x = 0
         self.remainder_y = 0
         self.position_history = []  # List to keep track of past positions
@@ -100,6 +103,7 @@ class Bat(Entity):
             return self.move_towards_player(dt)
 
         self.next_step = None
+        self.path.clear()
         self.remainder_x = 0
         self.remainder_y = 0
         self.level.from_box = None
@@ -120,12 +124,11 @@ class Bat(Entity):
         self.action_timer = 1
         has_set = False
 
-        if random.random() < 0.20:  # do nothing
+        if self.rng.random() < 0.20:  # do nothing
             self.set_action("idle")
             has_set = True
-        elif random.random() < 0.33:  # seek player
+        elif self.rng.random() < 0.33:  # seek player, from the next move on
             self.seeking_player = True
-            self.move_towards_player(dt)
             self.set_action("fly_right")
             has_set = True
 
@@ -143,7 +146,7 @@ class Bat(Entity):
             directions.remove(self.current_direction)
 
         if directions:
-            self.current_direction = random.choice(directions)
+            self.current_direction = self.rng.choice(directions)
 
         self.set_action(self.current_direction)
 
@@ -164,34 +167,40 @@ class Bat(Entity):
 
         return 0, 0
 
-    def get_next_step(self):
-        def div(x):
-            return round(x / st.TILE_SIZE)
+    def get_next_step(self, tile: tuple[int, int]):
+        target = self.level.tile_pos(self.player.rect.topleft)
 
-        start = (div(self.rect.y), div(self.rect.x))
-        end = (div(self.player.rect.y), div(self.player.rect.x))
+        # the next tile towards the player, or None if there is no path
+        if self.level.oracle is not None:
+            return self.level.oracle.next_step(tile, target)
 
-        grid = self.level.get_grid()
-        path = bfs(grid, start, end)
+        # the field is kept pointing at the player by the scheduler
+        return self.level.flow_field.next_step(*tile)
 
+    def replan(self):
+        # the next few tiles from the one the bat is flying to
         self.level.from_box = self.rect.topleft
-
-        if not path or len(path) < 2:  # No path or already at destination
-            print("No path")
-            return 0, 0
-
-        path = [(x, y) for y, x in path]  # flip x and y values
-
-        next_step = path.pop(0)
-        self.level.to_boxes = path
-        return next_step
+        tile = self.next_step or self.level.tile_pos(self.rect.topleft)
+
+        self.path.clear()
+        for _ in range(st.AI_PATH_LENGTH):
+            tile = self.get_next_step(tile)
+            if tile is None:
+                break
+            self.path.append(tile)
+
+    def request_path(self):
+        if self.scheduler is None:
+            with PATHFINDING:
+                target = self.level.tile_pos(self.player.rect.topleft)
+                self.level.flow_field.update(target)
+                self.replan()
+        else:
+            self.scheduler.request(self)
 
     def move_towards_player(self, dt: float):
-        if self.next_step is None:
-            self.next_step = self.get_next_step()
-
-        if self.next_step is None:
-            return 0, 0
+        if self.next_step is None:  # line up with the current tile first
+            self.next_step = self.level.tile_pos(self.rect.topleft)
 
         target_x = self.next_step[0] * st.TILE_SIZE
         target_y = self.next_step[1] * st.TILE_SIZE
@@ -235,11 +244,12 @@ class Bat(Entity):
 
         dx, dy = round(dx, 2), round(dy, 2)
 
-        # Check if the bat has reached the target tile
+        # Check if the bat has reached the target tile, then keep following the
+        # last plan while the scheduler gets round to a new one
         if abs(difference_x) <= tolerance and abs(difference_y) <= tolerance:
-            if len(self.level.to_boxes) > 0:
-                self.get_next_step()
-                self.next_step = self.level.to_boxes.pop(0)
+            self.request_path()
+            if self.path:
+                self.next_step = self.path.popleft()
                 self.remainder_x = difference_x
                 self.remainder_y = difference_y
             else:
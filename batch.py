@@ -0,0 +1,239 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+# workers never open a window
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import pygame
+import settings as st
+from pathfinder import FlowField
+from simulation import COIN, Simulation
+
+# settings a profile may override, with the defaults every run starts from
+KNOBS = ("HELP_AMOUNT", "COIN_AMOUNT", "BAT_AMOUNT", "SIZE_X", "SIZE_Y")
+DEFAULTS = {knob: getattr(st, knob) for knob in KNOBS}
+
+KEYS = {
+    (1, 0): pygame.K_RIGHT,
+    (-1, 0): pygame.K_LEFT,
+    (0, 1): pygame.K_DOWN,
+    (0, -1): pygame.K_UP,
+}
+
+
+class ScriptedPlayer:
+    """Walks the shortest path to the exit, one axis at a time."""
+
+    def __init__(self, simulation: Simulation) -> None:
+        self.simulation = simulation
+        self.held: set[int] = set()
+        self.field = FlowField(simulation.level.maze)
+        self.field.update(simulation.level.end_pos)
+
+    def wanted(self) -> set[int]:
+        level, player = self.simulation.level, self.simulation.player
+        tile = level.tile_pos(player.rect.topleft)
+        target = self.field.next_step(*tile) or level.end_pos
+
+        # line up exactly with the current tile before heading for the next
+        target_x, target_y = level.absoulte_pos(target)
+        tile_x, tile_y = level.absoulte_pos(tile)
+        if target_x != tile_x and player.rect.y != tile_y:
+            target_x = tile_x
+        if target_y != tile_y and player.rect.x != tile_x:
+            target_y = tile_y
+
+        difference_x = target_x - player.rect.x
+        difference_y = target_y - player.rect.y
+        if difference_x:
+            return {KEYS[(1 if difference_x > 0 else -1, 0)]}
+        if difference_y:
+            return {KEYS[(0, 1 if difference_y > 0 else -1)]}
+        return set()
+
+    def __call__(self, tick: int) -> list[tuple[int, int]]:
+        wanted = self.wanted()
+        inputs = [(pygame.KEYUP, key) for key in self.held - wanted]
+        inputs += [(pygame.KEYDOWN, key) for key in wanted - self.held]
+        self.held = wanted
+        return inputs
+
+
+class RandomPlayer:
+    """Holds a random arrow key and changes it every so often."""
+
+    def __init__(self, simulation: Simulation, rng: random.Random) -> None:
+        self.rng = rng
+        self.held = None
+
+    def __call__(self, tick: int) -> list[tuple[int, int]]:
+        if tick % 30:
+            return []
+
+        inputs = [(pygame.KEYUP, self.held)] if self.held is not None else []
+        self.held = self.rng.choice(list(KEYS.values()))
+        return inputs + [(pygame.KEYDOWN, self.held)]
+
+
+def apply_profile(profile: dict) -> None:
+    for knob in KNOBS:
+        setattr(st, knob, profile.get(knob, DEFAULTS[knob]))
+
+
+def run_game(task: tuple[int, dict, int, str, int]) -> dict:
+    index, profile, seed, player_kind, max_ticks = task
+    apply_profile(profile)
+
+    started = time.perf_counter()
+    simulation = Simulation(seed=seed)
+    level = simulation.level
+
+    if player_kind == "scripted":
+        player = ScriptedPlayer(simulation)
+        shortest = player.field.distance_to(*level.start_pos)
+    else:
+        player = RandomPlayer(simulation, random.Random(seed))
+        field = FlowField(level.maze)
+        field.update(level.end_pos)
+        shortest = field.distance_to(*level.start_pos)
+
+    walked = 0
+    tile = level.tile_pos(simulation.player.rect.topleft)
+    coins = 0
+
+    for tick in range(max_ticks):
+        events = simulation.step(st.FIXED_DT, player(tick))
+        coins += events.count(COIN)
+
+        new_tile = level.tile_pos(simulation.player.rect.topleft)
+        if new_tile != tile:
+            tile = new_tile
+            walked += 1
+
+        if simulation.outcome:
+            break
+
+    return {
+        "run": index,
+        "profile": profile,
+        "seed": seed,
+        "player": player_kind,
+        "outcome": simulation.outcome or "timeout",
+        "ticks": simulation.ticks,
+        "coins": coins,
+        "coins_total": coins + len(level.coins),
+        "shortest_path": shortest,
+        "walked": walked,
+        "seconds": round(time.perf_counter() - started, 4),
+    }
+
+
+def build_tasks(profiles, runs, seed, player_kind, max_ticks):
+    tasks = []
+    for profile in profiles:
+        for _ in range(runs):
+            index = len(tasks)
+            tasks.append((index, profile, seed + index, player_kind, max_ticks))
+    return tasks
+
+
+def sweep(values: dict[str, list]) -> list[dict]:
+    # every combination of the given knob values
+    knobs = [knob for knob in KNOBS if values.get(knob)]
+    combinations = itertools.product(*(values[knob] for knob in knobs))
+    return [dict(zip(knobs, combination)) for combination in combinations]
+
+
+def summarise(results: list[dict]) -> list[dict]:
+    groups: dict[str, list[dict]] = {}
+    for result in results:
+        key = json.dumps(result["profile"], sort_keys=True)
+        groups.setdefault(key, []).append(result)
+
+    summary = []
+    for key, group in groups.items():
+        count = len(group)
+        # -1 when the exit can't be reached, counted apart from the mean
+        paths = [r["shortest_path"] for r in group if r["shortest_path"] >= 0]
+        summary.append(
+            {
+                "profile": json.loads(key),
+                "runs": count,
+                "win_rate": sum(r["outcome"] == "win" for r in group) / count,
+                "lose_rate": sum(r["outcome"] == "lose" for r in group) / count,
+                "mean_ticks": sum(r["ticks"] for r in group) / count,
+                "mean_coins": sum(r["coins"] for r in group) / count,
+                "mean_shortest_path": sum(paths) / len(paths) if paths else None,
+                "unreachable": count - len(paths),
+            }
+        )
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run many seeded headless games.")
+    parser.add_argument("--profiles", help="JSON file with a list of settings dicts")
+    parser.add_argument("--help-amount", type=int, nargs="*", dest="HELP_AMOUNT")
+    parser.add_argument("--coin-amount", type=int, nargs="*", dest="COIN_AMOUNT")
+    parser.add_argument("--bat-amount", type=float, nargs="*", dest="BAT_AMOUNT")
+    parser.add_argument("--size-x", type=int, nargs="*", dest="SIZE_X")
+    parser.add_argument("--size-y", type=int, nargs="*", dest="SIZE_Y")
+    parser.add_argument("--runs", type=int, default=10, help="runs per profile")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--player", choices=("scripted", "random"), default="scripted")
+    parser.add_argument("--max-ticks", type=int, default=60 * 60 * 5)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="write one JSON result per line here")
+    args = parser.parse_args(argv)
+
+    # runs play a fixed maze to its exit, endless levels have neither
+    if st.ENDLESS:
+        parser.error("endless levels have no fixed maze, set ENDLESS = False")
+
+    if args.profiles:
+        with open(args.profiles) as file:
+            profiles = json.load(file)
+    else:
+        profiles = sweep(vars(args)) or [{}]
+
+    tasks = build_tasks(profiles, args.runs, args.seed, args.player, args.max_ticks)
+    output = open(args.output, "w") if args.output else None
+    results = []
+
+    # spawn so workers don't inherit the parent's initialised SDL state
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(args.workers) as pool:
+        for result in pool.imap_unordered(run_game, tasks, chunksize=4):
+            results.append(result)
+            if output:
+                output.write(json.dumps(result) + "\n")
+                output.flush()
+            print(
+                f"{len(results)}/{len(tasks)} run {result['run']}: "
+                f"{result['outcome']} after {result['ticks']} ticks",
+                file=sys.stderr,
+            )
+
+        # leaving the block terminates the pool, which workers ignore once
+        # SDL has taken over SIGTERM, so let them exit on their own first
+        pool.close()
+        pool.join()
+
+    if output:
+        output.close()
+
+    summary = summarise(results)
+    print(json.dumps(summary, indent=2))
+    return summary
+
+
+if __name__ == "__main__":
+    main()
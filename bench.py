@@ -0,0 +1,178 @@
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+
+# benchmarks render to SDL's dummy video driver
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import game
+import pygame
+import settings as st
+import swarm
+from camera import Camera
+from level import Level
+from pathfinder import astar, bfs, jps
+from presenter import Presenter
+from simulation import Simulation
+
+DEFAULT_SIZES = ("32x24", "128x96", "256x256")
+
+
+def measure(function, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        times.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "runs": repeat,
+        "min_ms": round(min(times), 4),
+        "median_ms": round(statistics.median(times), 4),
+        "max_ms": round(max(times), 4),
+    }
+
+
+def bench_case(width: int, height: int, bats: int, coins: int, repeat: int):
+    st.SIZE_X, st.SIZE_Y = width, height
+    st.BAT_AMOUNT, st.COIN_AMOUNT = bats, coins
+
+    # level builds are slow on big mazes, so they get fewer repeats
+    build_repeat = max(1, repeat // max(1, width * height // 4096))
+    yield "level_init", measure(lambda: Level(0), build_repeat)
+
+    level = Level(0)
+    yield "generate_maze", measure(
+        lambda: level.generate_maze(width, height), build_repeat
+    )
+    yield "get_grid", measure(level.get_grid, repeat)
+
+    grid = level.get_grid()
+    start = level.start_pos[::-1]  # bfs wants (row, col)
+    end = level.end_pos[::-1]
+    yield "bfs", measure(lambda: bfs(grid, start, end), repeat)
+    yield "astar", measure(lambda: astar(level.maze, start, end), repeat)
+    yield "jps", measure(lambda: jps(level.maze, start, end), repeat)
+
+    simulation = Simulation(level, seed=0)
+    entities = [simulation.player, *simulation.bats]
+
+    def move_and_collide():
+        for entity in entities:
+            entity.move_and_collide((1, 1), level.wall_index)
+            entity.move_and_collide((-1, -1), level.wall_index)
+
+    yield "move_and_collide", measure(move_and_collide, repeat)
+
+    # full redraws of the view around the player, culled to the visible tiles
+    view = pygame.Surface(st.SURFACE_SIZE)
+    camera = Camera(st.SURFACE_SIZE, (width * st.TILE_SIZE, height * st.TILE_SIZE))
+    camera.follow(simulation.player.rect)
+    origin = camera.origin
+    yield "level_draw", measure(lambda: level.draw(view, None, origin), repeat)
+
+    presenter = Presenter(pygame.display.get_surface(), view)
+
+    def frame():
+        simulation.step(st.FIXED_DT)
+        game.draw(presenter, camera, simulation)
+
+    yield "frame", measure(frame, repeat)
+
+    # the same bats as one numpy swarm, when numpy is installed
+    if swarm.np is not None:
+        positions = [bat.rect.topleft for bat in simulation.bats]
+        horde = swarm.BatSwarm(level, positions, seed=0)
+        player = simulation.player
+        yield "swarm_update", measure(lambda: horde.update(st.FIXED_DT, player), repeat)
+
+
+def compare(results: list[dict], baseline: list[dict], threshold: float):
+    # median ratio against the baseline for every case found in both
+    def key(result):
+        return result["name"], result["size"], result["bats"], result["coins"]
+
+    previous = {key(result): result for result in baseline}
+    regressions = []
+
+    for result in results:
+        old = previous.get(key(result))
+        if not old or not old["median_ms"]:
+            continue
+
+        result["baseline_median_ms"] = old["median_ms"]
+        result["ratio"] = round(result["median_ms"] / old["median_ms"], 3)
+        if result["ratio"] > 1 + threshold:
+            regressions.append(result)
+
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the game's hot paths.")
+    # 1024x1024 works too, peaking around 430 MB, but its searches take about
+    # a second each and the case runs a minute at the default repeat
+    parser.add_argument("--sizes", nargs="*", default=DEFAULT_SIZES, help="WxH")
+    parser.add_argument("--bats", type=int, nargs="*", default=[3])
+    parser.add_argument("--coins", type=int, nargs="*", default=[10])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1, help="max slowdown")
+    args = parser.parse_args(argv)
+
+    # the cases time fixed mazes, endless levels have no grid to search
+    if st.ENDLESS:
+        parser.error("endless levels have no fixed maze, set ENDLESS = False")
+
+    pygame.display.set_mode(st.WINDOW_SIZE)
+    results = []
+
+    cases = itertools.product(args.sizes, args.bats, args.coins)
+    for size, bats, coins in cases:
+        width, height = (int(n) for n in size.split("x"))
+        for name, timing in bench_case(width, height, bats, coins, args.repeat):
+            result = {"name": name, "size": size, "bats": bats, "coins": coins}
+            result.update(timing)
+            results.append(result)
+            print(
+                f"{size:>10} bats={bats:<4} coins={coins:<4} {name:<17}"
+                f" median {timing['median_ms']:10.3f} ms",
+                file=sys.stderr,
+            )
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare(results, baseline, args.threshold)
+
+    report = {
+        "python": platform.python_version(),
+        "pygame": pygame.version.ver,
+        "machine": platform.machine(),
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    for result in regressions:
+        print(
+            f"REGRESSION {result['name']} {result['size']} bats={result['bats']} "
+            f"coins={result['coins']}: {result['baseline_median_ms']} ms -> "
+            f"{result['median_ms']} ms (x{result['ratio']})",
+            file=sys.stderr,
+        )
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
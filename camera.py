@@ -0,0 +1,41 @@
+import pygame
+
+
+class Camera:
+    """Window onto the maze that keeps its target centered.
+
+    The view is clamped to the maze, and a maze smaller than the view is
+    centered in it instead. Without a world size the view is never clamped.
+    """
+
+    def __init__(self, view_size: tuple[int, int], world_size: tuple[int, int]):
+        self.view = pygame.Rect((0, 0), view_size)
+        self.world_size = world_size
+
+    @property
+    def origin(self) -> tuple[int, int]:
+        return self.view.topleft
+
+    def clamp(self, position: int, view: int, world: int) -> int:
+        if world <= view:
+            return (world - view) // 2
+        return min(max(position, 0), world - view)
+
+    def follow(self, target: pygame.Rect) -> bool:
+        # True when the view moved and everything on screen has to be redrawn
+        view_width, view_height = self.view.size
+        x = target.centerx - view_width // 2
+        y = target.centery - view_height // 2
+
+        if self.world_size is not None:
+            world_width, world_height = self.world_size
+            x = self.clamp(x, view_width, world_width)
+            y = self.clamp(y, view_height, world_height)
+
+        moved = (x, y) != self.view.topleft
+        self.view.topleft = x, y
+        return moved
+
+    def visible(self, rect: pygame.Rect, margin: int = 0) -> bool:
+        # margin covers sprites that are drawn a little outside their rect
+        return self.view.inflate(margin * 2, margin * 2).colliderect(rect)
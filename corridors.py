@@ -0,0 +1,279 @@
+from array import array
+from heapq import heappop, heappush
+
+from grid import TUNNEL, WALL, Grid
+
+
+class CorridorGraph:
+    """Maze compressed to junctions, dead ends and tunnels joined by corridors.
+
+    Every open cell is either a node or sits inside exactly one corridor
+    edge, so a path between any two cells can be found on the much smaller
+    graph and only expanded back to tiles when it is walked.
+    """
+
+    def __init__(self, maze: Grid) -> None:
+        self.maze = maze
+        size = len(maze.cells)
+
+        self.nodes: list[int] = []
+        self.node_of = array("i", [-1]) * size
+        self.adjacency: list[list[tuple[int, int, int]]] = []  # (node, cost, edge)
+
+        # edge = (from node, to node, corridor cells from the "from" side)
+        self.edges: list[tuple[int, int, array]] = []
+        self.edge_of = array("i", [-1]) * size
+        self.position = array("i", [0]) * size
+
+        self.build()
+
+        # node coordinates for the heuristic and reusable search buffers
+        self.node_x = array("i", (index % maze.width for index in self.nodes))
+        self.node_y = array("i", (index // maze.width for index in self.nodes))
+        self.generation = 0
+        self.seen = array("i", [0]) * len(self.nodes)
+        self.cost = array("i", [0]) * len(self.nodes)
+        self.parent: list[tuple[int, int]] = [None] * len(self.nodes)
+
+    def open_neighbours(self, index: int) -> list[int]:
+        width, cells = self.maze.width, self.maze.cells
+        size = len(cells)
+        x = index % width
+
+        found = []
+        if index >= width and cells[index - width] != WALL:
+            found.append(index - width)
+        if index + width < size and cells[index + width] != WALL:
+            found.append(index + width)
+        if x > 0 and cells[index - 1] != WALL:
+            found.append(index - 1)
+        if x < width - 1 and cells[index + 1] != WALL:
+            found.append(index + 1)
+        return found
+
+    def add_node(self, index: int) -> int:
+        node = len(self.nodes)
+        self.nodes.append(index)
+        self.node_of[index] = node
+        self.adjacency.append([])
+        return node
+
+    def build(self) -> None:
+        cells = self.maze.cells
+
+        for index, cell in enumerate(cells):
+            if cell == WALL:
+                continue
+            if cell == TUNNEL or len(self.open_neighbours(index)) != 2:
+                self.add_node(index)
+
+        # Walk out of every node along each corridor until the next node
+        node = 0
+        while True:
+            while node < len(self.nodes):
+                for first in self.open_neighbours(self.nodes[node]):
+                    self.walk(node, first)
+                node += 1
+
+            # loops with no junction at all get one of their cells as a node
+            leftover = next(
+                (
+                    index
+                    for index, cell in enumerate(cells)
+                    if cell != WALL
+                    and self.node_of[index] == -1
+                    and self.edge_of[index] == -1
+                ),
+                None,
+            )
+            if leftover is None:
+                break
+            self.add_node(leftover)
+
+    def walk(self, node: int, first: int) -> None:
+        if self.edge_of[first] != -1:
+            return  # corridor was already walked from its other end
+
+        other = self.node_of[first]
+        if other != -1:
+            # neighbouring nodes, only add the edge once
+            if other > node:
+                self.add_edge(node, other, array("i"))
+            return
+
+        corridor = array("i")
+        previous, index = self.nodes[node], first
+        while self.node_of[index] == -1:
+            corridor.append(index)
+            following = [n for n in self.open_neighbours(index) if n != previous]
+            previous, index = index, following[0]
+
+        self.add_edge(node, self.node_of[index], corridor)
+
+    def add_edge(self, start: int, end: int, corridor: array) -> None:
+        edge = len(self.edges)
+        self.edges.append((start, end, corridor))
+
+        for position, index in enumerate(corridor):
+            self.edge_of[index] = edge
+            self.position[index] = position
+
+        cost = len(corridor) + 1
+        self.adjacency[start].append((end, cost, edge))
+        self.adjacency[end].append((start, cost, edge))
+
+    def anchors(self, index: int) -> list[tuple[int, int, int]]:
+        # (node, cost, side) for the nodes a cell reaches along its corridor,
+        # side 0 walks towards the edge's first node and 1 towards its last
+        node = self.node_of[index]
+        if node != -1:
+            return [(node, 0, 0)]
+
+        start, end, corridor = self.edges[self.edge_of[index]]
+        position = self.position[index]
+        return [(start, position + 1, 0), (end, len(corridor) - position, 1)]
+
+    def search(self, start: int, end: int):
+        # A* over nodes with a Manhattan heuristic, corridors are never shorter
+        width = self.maze.width
+        end_x, end_y = end % width, end // width
+        node_x, node_y, adjacency = self.node_x, self.node_y, self.adjacency
+
+        goals: dict[int, tuple[int, int]] = {}
+        for node, step, side in self.anchors(end):
+            if node not in goals or step < goals[node][0]:
+                goals[node] = step, side
+
+        best, best_node, best_side = None, None, 0
+
+        # a start and end inside the same corridor can skip the graph
+        edge = self.edge_of[start]
+        if edge != -1 and edge == self.edge_of[end]:
+            best = abs(self.position[start] - self.position[end])
+
+        self.generation += 1
+        generation, seen, cost, parent = (
+            self.generation,
+            self.seen,
+            self.cost,
+            self.parent,
+        )
+        heap = []
+        for node, step, side in self.anchors(start):
+            if seen[node] != generation or step < cost[node]:
+                seen[node] = generation
+                cost[node] = step
+                parent[node] = (-1, side)  # (node, edge) or (-1, side)
+                estimate = step + abs(node_x[node] - end_x) + abs(node_y[node] - end_y)
+                heappush(heap, (estimate, step, node))
+
+        while heap:
+            estimate, step, node = heappop(heap)
+            if best is not None and estimate >= best:
+                break
+            if step > cost[node]:  # stale heap entry
+                continue
+
+            if node in goals:
+                goal_cost, side = goals[node]
+                if best is None or step + goal_cost < best:
+                    best, best_node, best_side = step + goal_cost, node, side
+
+            for other, weight, edge in adjacency[node]:
+                new_cost = step + weight
+                if seen[other] != generation or new_cost < cost[other]:
+                    seen[other] = generation
+                    cost[other] = new_cost
+                    parent[other] = (node, edge)
+                    estimate = (
+                        new_cost
+                        + abs(node_x[other] - end_x)
+                        + abs(node_y[other] - end_y)
+                    )
+                    heappush(heap, (estimate, new_cost, other))
+
+        if best is None:
+            return None
+
+        # route is [(first node, start side), (node, edge), ..., (last node, edge)]
+        # and stays empty when the path never leaves the start's corridor
+        route = []
+        node = -1 if best_node is None else best_node
+        while node != -1:
+            previous, edge = parent[node]
+            route.append((node, edge))
+            node = previous
+        return best, route[::-1], best_side
+
+    def resolve(self, start, end):
+        maze = self.maze
+        if not (maze.in_bounds(*start) and maze.in_bounds(*end)):
+            return None
+
+        start_index = start[1] * maze.width + start[0]
+        end_index = end[1] * maze.width + end[0]
+        if WALL in (maze.cells[start_index], maze.cells[end_index]):
+            return None
+
+        return start_index, end_index
+
+    def distance(self, start: tuple[int, int], end: tuple[int, int]) -> int:
+        # -1 when there is no path
+        indexes = self.resolve(start, end)
+        found = indexes and self.search(*indexes)
+        return found[0] if found else -1
+
+    def path(self, start: tuple[int, int], end: tuple[int, int]):
+        # yields (x, y) tiles from start to end lazily, both ends included
+        indexes = self.resolve(start, end)
+        found = indexes and self.search(*indexes)
+        if not found:
+            return
+
+        width = self.maze.width
+        for index in self.expand(*indexes, *found):
+            yield index % width, index // width
+
+    def next_step(self, start: tuple[int, int], end: tuple[int, int]):
+        steps = self.path(start, end)
+        next(steps, None)
+        return next(steps, None)
+
+    def expand(self, start: int, end: int, length: int, route, end_side: int):
+        yield start
+        if start == end:
+            return
+
+        if not route:  # same corridor, no node on the way
+            corridor = self.edges[self.edge_of[start]][2]
+            a, b = self.position[start], self.position[end]
+            step = 1 if b > a else -1
+            for position in range(a + step, b + step, step):
+                yield corridor[position]
+            return
+
+        # from the start cell along its own corridor to the first node
+        first, side = route[0]
+        if self.node_of[start] == -1:
+            corridor = self.edges[self.edge_of[start]][2]
+            position = self.position[start]
+            if side == 0:
+                yield from reversed(corridor[:position])
+            else:
+                yield from corridor[position + 1 :]
+            yield self.nodes[first]
+
+        for (previous, _), (node, edge) in zip(route, route[1:]):
+            from_node, _, corridor = self.edges[edge]
+            yield from corridor if from_node == previous else reversed(corridor)
+            yield self.nodes[node]
+
+        # and from the last node into the corridor holding the end cell
+        if self.node_of[end] == -1:
+            corridor = self.edges[self.edge_of[end]][2]
+            position = self.position[end]
+            if end_side == 0:
+                yield from corridor[:position]
+            else:
+                yield from reversed(corridor[position + 1 :])
+            yield end
@@ -2,7 +2,10 @@ import os
 
 import pygame
 
-from utils import Animation, blit_center, collision_rect, flip, load_animation
+from profiler import profiler
+from utils import Animation, collision_rect, load_animation
+
+COLLISION = profiler.phase("collision")
 
 
 class Entity:
@@ -29,6 +32,7 @@ class Entity:
         self.frame_time = 0
         self.frame_duration = 0
         self.current_action = ""
+        self.current_animation: Animation = None
         self.phase = False
 
     def image(self):
@@ -46,6 +50,9 @@ class Entity:
     def load_animations(self, animations: list[dict[str]]) -> None:
         for data in animations:
             name = data["name"]
+            if f"{self.type};{name}" in self.animation:
+                continue  # shared by every entity of this type
+
             durations: list[float] = data.get("durations", [])
             tags: list[str] = data.get("tags", [])
             colorkey = data.get("colorkey", "#FFFFFF")
@@ -71,6 +78,7 @@ class Entity:
         self.frame_time = 0
 
         animation = self.animation[self.animation_key()]
+        self.current_animation = animation
         self.frame_duration = animation[self.current_frame].duration
 
     def update_frame(self, dt: float, direction: int = 1) -> None:
@@ -78,7 +86,7 @@ class Entity:
 
         if self.frame_time >= self.frame_duration:
             self.frame_time = 0
-            frames = self.animation[self.animation_key()]
+            frames = self.current_animation
 
             dire = 1 if direction >= 0 else -1
             next_frame = (self.current_frame + dire) % len(frames)
@@ -95,76 +103,75 @@ class Entity:
             self.current_frame = len(frames) - 1 if end_forward else 0
 
     def prepare_image(self) -> tuple[pygame.Surface, float, float]:
-        if self.animation:
-            pre_image = self.animation[self.animation_key()][self.current_frame].image
-
-        else:
-            pre_image = self.image() or None
-
-        if not pre_image:
+        # the current frame's shared surface, already flipped if needed
+        if not self.current_animation:
             return None
 
-        image = flip(pre_image, self.flip).copy()
-        center_x = image.get_width() / 2
-        center_y = image.get_height() / 2
+        frame = self.current_animation[self.current_frame]
+        image = frame.flipped if self.flip else frame.image
 
-        return image, center_x, center_y
+        return image, frame.half_width, frame.half_height
 
     def display(
         self, surface: pygame.Surface, viewport_origin: tuple[int, int]
-    ) -> None:
-        data = self.prepare_image()
-
-        if data is None or len(data) != 3:
+    ) -> pygame.Rect:
+        if not self.current_animation:
             raise ValueError("No image to display")
 
-        flip_offset = self.rect.width if self.flip else 0
-
-        image, center_x, center_y = data
-        pos_x = int(self.x) - viewport_origin[0] + self.offset[0] + center_x
-        pos_y = int(self.y) - viewport_origin[1] + self.offset[1] + center_y
-
-        blit_center(surface, image, (pos_x - flip_offset, pos_y))
-
-    def move_and_collide(
-        self, movement: tuple[int, int], all_tiles: list[pygame.Rect]
-    ) -> dict[str, bool]:
-        collision_types = {"left": False, "top": False, "right": False, "bottom": False}
-        tiles = all_tiles.copy()
-
-        self.x += movement[0]
-        self.rect.x = int(self.x)
-
-        block_hit_list: list[pygame.Rect] = collision_rect(self.rect, tiles)
-        for block in block_hit_list:
-            if self.phase:
-                continue
-
-            if movement[0] > 0:
-                self.rect.right = block.left
-                collision_types["right"] = True
-            elif movement[0] < 0:
-                self.rect.left = block.right
-                collision_types["left"] = True
-
-            self.x = self.rect.x
-
-        self.y += movement[1]
-        self.rect.y = int(self.y)
-
-        block_hit_list: list[pygame.Rect] = collision_rect(self.rect, tiles)
-        for block in block_hit_list:
-            if self.phase:
-                continue
-
-            if movement[1] > 0:
-                self.rect.bottom = block.top
-                collision_types["bottom"] = True
-            elif movement[1] < 0:
-                self.rect.top = block.bottom
-                collision_types["top"] = True
-
-            self.y = self.rect.y
-            
-
-        return collision_types
+        # same spot blit_center used to pick, without building a new surface
+        frame = self.current_animation[self.current_frame]
+        pos_x = int(self.x) - viewport_origin[0] + self.offset[0] + frame.center_x
+        pos_y = int(self.y) - viewport_origin[1] + self.offset[1] + frame.center_y
+
+        # the area drawn over, for dirty-rect updates
+        if self.flip:
+            return surface.blit(frame.flipped, (pos_x - self.rect.width, pos_y))
+        return surface.blit(frame.image, (pos_x, pos_y))
+
+    def move_and_collide(self, movement: tuple[int, int], tiles) -> dict[str, bool]:
+        # tiles is the level's WallIndex, queried once per axis sweep
+        with COLLISION:
+            collision_types = {
+                "left": False,
+                "top": False,
+                "right": False,
+                "bottom": False,
+            }
+
+            self.x += movement[0]
+            self.rect.x = int(self.x)
+
+            nearby = tiles.query(self.rect)
+            block_hit_list: list[pygame.Rect] = collision_rect(self.rect, nearby)
+            for block in block_hit_list:
+                if self.phase:
+                    continue
+
+                if movement[0] > 0:
+                    self.rect.right = block.left
+                    collision_types["right"] = True
+                elif movement[0] < 0:
+                    self.rect.left = block.right
+                    collision_types["left"] = True
+
+                self.x = self.rect.x
+
+            self.y += movement[1]
+            self.rect.y = int(self.y)
+
+            nearby = tiles.query(self.rect)
+            block_hit_list: list[pygame.Rect] = collision_rect(self.rect, nearby)
+            for block in block_hit_list:
+                if self.phase:
+                    continue
+
+                if movement[1] > 0:
+                    self.rect.bottom = block.top
+                    collision_types["bottom"] = True
+                elif movement[1] < 0:
+                    self.rect.top = block.bottom
+                    collision_types["top"] = True
+
+                self.y = self.rect.y
+
+            return collision_types
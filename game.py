@@ -1,97 +1,151 @@
+import os
+import time
+
 import pygame
 import settings as st
-from bat import Bat
-from entity import Entity
-from level import Level
-from player import Player
+from camera import Camera
+from level import LevelParams
+from prefetch import prefetcher
+from presenter import Presenter
+from profiler import profiler
+from replay import Recorder
+from simulation import LOSE, WIN, Simulation
+
+EVENTS = profiler.phase("events")
+UPDATE = profiler.phase("update")
+LEVEL_DRAW = profiler.phase("level_draw")
+ENTITIES = profiler.phase("entities")
+SCALE = profiler.phase("scale")
+FLIP = profiler.phase("flip")
+
+show_profiler = False
+
+
+def next_difficulty(outcome: str) -> tuple[int, float, int]:
+    # help, bat and coin amounts of the level after this outcome
+    if outcome == WIN:
+        return st.HELP_AMOUNT - 5, st.BAT_AMOUNT + 0.5, st.COIN_AMOUNT + 5
+    return 40, 3.0, 10
+
+
+def draw(presenter: Presenter, camera: Camera, simulation: Simulation) -> None:
+    game_surface = presenter.surface
+    player = simulation.player
 
+    # a scrolled view or the overlay on top of the frame need a full redraw
+    if camera.follow(player.rect) or show_profiler:
+        presenter.invalidate()
 
-def update(dt: float, level, player, bats) -> None:
+    # Draw game here, only the areas that changed after the first frame
+    with LEVEL_DRAW:
+        origin = camera.origin
+        cleared = simulation.level.draw(game_surface, presenter.areas(), origin)
 
-    # Update player and bats
-    tiles = level.walls
-    player.update(dt, tiles)
+    # entities outside the view are skipped
+    with ENTITIES:
+        for entity in (player, *simulation.bats):
+            if camera.visible(entity.rect, st.TILE_SIZE):
+                presenter.add(entity.display(game_surface, origin))
 
-    for bat in bats:
-        bat.update(dt, tiles, player, level)
+        if simulation.swarm is not None:
+            for rect in simulation.swarm.draw(game_surface, camera.view):
+                presenter.add(rect)
+
+    # Scale the game surface onto the screen
+    with SCALE:
+        presenter.present(cleared)
+
+    if show_profiler:
+        profiler.draw(presenter.screen)
+
+    with FLIP:
+        presenter.flip()
 
 
 def main():
+    global show_profiler
+
     # Initialize pygame
     width, height = st.WINDOW_WIDTH, st.WINDOW_HEIGHT
     screen = pygame.display.set_mode((width, height))
     game_surface = pygame.Surface((st.SURFACE_WIDTH, st.SURFACE_HEIGHT))
+    presenter = Presenter(screen, game_surface)
     clock = pygame.time.Clock()
 
-    # Initialize game objects
-    level = Level()
-    start_pos = level.absoulte_pos(level.start_pos)
-    end_rect = level.absoulte_pos(level.end_pos), (st.TILE_SIZE, st.TILE_SIZE)
+    simulation = prefetcher.take()
+    bats = simulation.bats
 
-    player = Player(pygame.Rect(start_pos, (16, 16)))
-    bats: list[Bat] = []
+    # the levels after a win and after a loss are made while this one is played
+    for outcome in (WIN, LOSE):
+        tunnels, _, coins = next_difficulty(outcome)
+        params = LevelParams.current()._replace(tunnels=tunnels, coins=coins)
+        prefetcher.prefetch(params)
 
-    for _ in range(int(st.BAT_AMOUNT)):
-        pos = level.absoulte_pos(level.get_random_pos())
-        rect = pygame.Rect(pos, (16, 16))
-        bat = Bat(rect)
-        bats.append(bat)
+    # the camera only stops at the edges of a fixed maze
+    world_size = None
+    if (maze := simulation.level.maze) is not None:
+        world_size = maze.width * st.TILE_SIZE, maze.height * st.TILE_SIZE
+    camera = Camera(game_surface.get_size(), world_size)
+
+    if st.REPLAY_DIR:
+        name = f"{time.strftime('%Y%m%d-%H%M%S')}-{simulation.seed}.replay"
+        path = os.path.join(st.REPLAY_DIR, name)
+        simulation.recorder = Recorder(path, simulation)
+
+    inputs = []
+    accumulator = 0.0
 
     # Main game loop
     while True:
+        # clock.tick sleeps, so the frame is timed from after it
+        accumulator = min(accumulator + clock.tick(60) / 1000.0, st.MAX_FRAME_TIME)
+        profiler.begin_frame()
+
         # Event handling in the game loop
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
-                return None
-            if event.type == pygame.KEYDOWN:
-                player.handle_keydown(event.key)
-            if event.type == pygame.KEYUP:
-                player.handle_keyup(event.key)
-
-        game_surface.fill((0, 0, 0))
-
-        # Check if player has reached the end
-        if player.rect.colliderect(end_rect):
-            st.HELP_AMOUNT -= 5
-            st.BAT_AMOUNT += 0.5
-            st.COIN_AMOUNT += 5
-            return "You Win!"
-
-        # if player collides with bat you lose
-        for bat in bats:
-            # Check if player has reached the end
-            if player.rect.colliderect(bat):
-                # Adjust game parameters and return the game outcome
-                st.HELP_AMOUNT = 40
-                st.BAT_AMOUNT = 3.0
-                st.COIN_AMOUNT = 10
-                return "You Lose!"
-
-        # if player collides with coins del coin
-        for coin in level.coins: 
-            if player.rect.colliderect(coin):
-                level.coins.remove(coin)
-
-        # Draw game here
-        level.draw(game_surface)
-        player.display(game_surface, (0, 0))
-        for bat in bats:
-            bat.display(game_surface, (0, 0))
-
-        # Scale and blit the game surface to the screen
-        scaled_surface = pygame.transform.scale(game_surface, st.WINDOW_SIZE)
-        screen.blit(scaled_surface, (0, 0))
-        pygame.display.flip()
-
-        # Update game objects here
-        dt = clock.tick(60) / 1000.0
-        update(dt, level, player, bats)
+        with EVENTS:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    if simulation.recorder:
+                        simulation.recorder.close()
+                    if st.PROFILE:
+                        profiler.export(st.PROFILE_TRACE)
+                    return None
+                if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                    show_profiler = not show_profiler
+                    profiler.enabled = st.PROFILE or show_profiler
+                    presenter.invalidate()
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_F4:
+                    profiler.export(st.PROFILE_TRACE)
+                elif event.type in (pygame.KEYDOWN, pygame.KEYUP):
+                    inputs.append((event.type, event.key))
+
+        # Advance the simulation in fixed steps, skipping time after long stalls
+        with UPDATE:
+            while accumulator >= st.FIXED_DT:
+                accumulator -= st.FIXED_DT
+                simulation.step(st.FIXED_DT, inputs)
+                inputs = []
+
+        if simulation.outcome and simulation.recorder:
+            simulation.recorder.close()
+
+        if simulation.outcome:
+            # Adjust game parameters and return the game outcome
+            difficulty = next_difficulty(simulation.outcome)
+            st.HELP_AMOUNT, st.BAT_AMOUNT, st.COIN_AMOUNT = difficulty
+            return "You Win!" if simulation.outcome == WIN else "You Lose!"
+
+        draw(presenter, camera, simulation)
+        profiler.end_frame()
 
         # Set window name to framerate
         framerate = clock.get_fps()
 
-        bat_ai = "seeking" if bats[0].seeking_player else "random"
-        bat_ai = "idle" if bats[0].current_action == "idle" else bat_ai
+        if bats:
+            bat_ai = "seeking" if bats[0].seeking_player else "random"
+            bat_ai = "idle" if bats[0].current_action == "idle" else bat_ai
+        else:
+            bat_ai = "swarm" if simulation.swarm is not None else "none"
 
         pygame.display.set_caption(f"Framerate: {framerate:.2f} | Bat AI {bat_ai}")
 
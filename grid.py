@@ -0,0 +1,108 @@
+AIR = 0
+WALL = 1
+TUNNEL = 2
+COIN = 3
+
+# up, right, down, left
+DIRECTIONS = ((0, -1), (1, 0), (0, 1), (-1, 0))
+
+# translation table that maps every cell value to 1 for walls and 0 otherwise
+_WALL_TABLE = bytes(1 if value == WALL else 0 for value in range(256))
+
+
+def parse_coord(coord: str | tuple[int, int]) -> tuple[int, int]:
+    # accepts the legacy "x;y" keys as well as (x, y) tuples
+    if isinstance(coord, str):
+        x, y = coord.split(";")
+        return int(x), int(y)
+
+    return coord
+
+
+class Grid:
+    """Row-major maze grid storing one byte per cell."""
+
+    def __init__(self, width: int, height: int, fill: int = WALL) -> None:
+        self.width = width
+        self.height = height
+        self.cells = bytearray([fill]) * (width * height)
+
+    def in_bounds(self, x: int, y: int) -> bool:
+        return 0 <= x < self.width and 0 <= y < self.height
+
+    def index(self, x: int, y: int) -> int:
+        return y * self.width + x
+
+    def get(self, x: int, y: int, default: int = None) -> int:
+        if 0 <= x < self.width and 0 <= y < self.height:
+            return self.cells[y * self.width + x]
+
+        return default
+
+    def set(self, x: int, y: int, value: int) -> None:
+        self.cells[y * self.width + x] = value
+
+    def neighbours(self, x: int, y: int) -> list[tuple[int, int, int]]:
+        # only neighbours inside the grid are returned, as (x, y, value)
+        found = []
+        for dx, dy in DIRECTIONS:
+            nx, ny = x + dx, y + dy
+            if 0 <= nx < self.width and 0 <= ny < self.height:
+                found.append((nx, ny, self.cells[ny * self.width + nx]))
+
+        return found
+
+    def row(self, y: int) -> memoryview:
+        start = y * self.width
+        return memoryview(self.cells)[start : start + self.width]
+
+    def wall_bytes(self) -> bytes:
+        # 1 for walls and 0 for everything passable, one byte per cell
+        return bytes(self.cells.translate(_WALL_TABLE))
+
+    def wall_rows(self) -> list[list[int]]:
+        # 0 for passable, 1 for walls
+        walls = self.wall_bytes()
+        width = self.width
+        return [list(walls[y * width : (y + 1) * width]) for y in range(self.height)]
+
+    def keys(self):
+        for y in range(self.height):
+            for x in range(self.width):
+                yield x, y
+
+    def items(self):
+        cells = self.cells
+        width = self.width
+        for y in range(self.height):
+            offset = y * width
+            for x in range(width):
+                yield (x, y), cells[offset + x]
+
+    def copy(self) -> "Grid":
+        grid = Grid(self.width, self.height)
+        grid.cells[:] = self.cells
+        return grid
+
+    def __len__(self) -> int:
+        return self.width * self.height
+
+    # compatibility shim for code that still uses "x;y" string keys
+
+    def __getitem__(self, coord: str | tuple[int, int]) -> int:
+        x, y = parse_coord(coord)
+        if not self.in_bounds(x, y):
+            raise KeyError(coord)
+
+        return self.cells[y * self.width + x]
+
+    def __setitem__(self, coord: str | tuple[int, int], value: int) -> None:
+        x, y = parse_coord(coord)
+        if not self.in_bounds(x, y):
+            raise KeyError(coord)
+
+        self.cells[y * self.width + x] = value
+
+    def __contains__(self, coord: str | tuple[int, int]) -> bool:
+        x, y = parse_coord(coord)
+        return self.in_bounds(x, y)
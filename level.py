@@ -1,108 +1,390 @@
 import os
 import random
+from collections import OrderedDict
+from typing import NamedTuple
 
+import levelfile
+import mazegen
+import oracle
 import pygame
 import settings as st
+from corridors import CorridorGraph
+from grid import AIR, COIN, TUNNEL, WALL, parse_coord
+from pathfinder import FlowField
 from utils import load_image, load_spritesheet
 
 
-class Level:
-    def __init__(self):
-        path = f"tilesets{os.sep}"
-        self.background_tiles = load_spritesheet(f"{path}background", [16] * 2)
-        self.left_right_tiles = load_spritesheet(f"{path}left_right", [16] * 2)
-        self.up_down_tiles = load_spritesheet(f"{path}up_down", [16] * 2)
-        self.tunnels_tiles = load_spritesheet(f"{path}tunnels", [16] * 2)
+class TileIndex:
+    """Rects keyed by tile, so lookups only look at the covered cells."""
 
-        self.coin_image = load_image(f"{path}coin")
-        entrance_image = load_image(f"{path}entrance")
-        exit_image = load_image(f"{path}exit")
+    def __init__(self, tile_size: int) -> None:
+        self.tile_size = tile_size
+        self.rects: dict[tuple[int, int], pygame.Rect] = {}
 
-        maze_object = self.generate_maze(st.SIZE_X, st.SIZE_Y)
-        self.maze, self.start_pos, self.end_pos = maze_object
+    def add(self, coord: tuple[int, int], rect: pygame.Rect) -> None:
+        self.rects[coord] = rect
+
+    def covered(self, rect: pygame.Rect) -> list[tuple[int, int]]:
+        size = self.tile_size
+        left, right = rect.left // size, (rect.right - 1) // size
+        top, bottom = rect.top // size, (rect.bottom - 1) // size
+
+        return [
+            (x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)
+        ]
+
+    def query(self, rect: pygame.Rect) -> list[pygame.Rect]:
+        found = []
+        for coord in self.covered(rect):
+            tile = self.rects.get(coord)
+            if tile is not None:
+                found.append(tile)
+
+        return found
+
+    def __iter__(self):
+        return iter(self.rects.values())
+
+    def __len__(self) -> int:
+        return len(self.rects)
+
+
+class CoinStore(TileIndex):
+    """Remaining coins by tile plus a count of the ones already picked up."""
+
+    def __init__(self, tile_size: int) -> None:
+        super().__init__(tile_size)
+        self.collected = 0
+        self.cleared: list[pygame.Rect] = []  # picked up, not yet drawn over
+
+    def collect(self, rect: pygame.Rect) -> list[pygame.Rect]:
+        picked = []
+        for coord in self.covered(rect):
+            coin = self.rects.get(coord)
+            if coin is not None and rect.colliderect(coin):
+                del self.rects[coord]
+                picked.append(coin)
+
+        self.collected += len(picked)
+        self.cleared += picked
+        return picked
+
+
+class SpatialHash:
+    """Moving entities bucketed by the cells their rects cover.
+
+    update() only moves the entities whose rects crossed into other cells,
+    so queries look at the entities near them instead of all of them.
+    """
 
+    def __init__(self, cell_size: int) -> None:
+        self.cell_size = cell_size
+        # dicts rather than sets, so results come in a repeatable order
+        self.cells: dict[tuple[int, int], dict] = {}
+        self.spans: dict = {}  # entity -> (left, top, right, bottom) cells
 
+    def span(self, rect: pygame.Rect) -> tuple[int, int, int, int]:
+        size = self.cell_size
+        left, right = rect.left // size, (rect.right - 1) // size
+        top, bottom = rect.top // size, (rect.bottom - 1) // size
+        return left, top, right, bottom
+
+    def covered(self, span: tuple[int, int, int, int]) -> list[tuple[int, int]]:
+        left, top, right, bottom = span
+        return [
+            (x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)
+        ]
+
+    def update(self, entities) -> None:
+        for entity in entities:
+            span = self.span(entity.rect)
+            old = self.spans.get(entity)
+            if span == old:
+                continue
+
+            if old is not None:
+                self.remove(entity)
+            for cell in self.covered(span):
+                self.cells.setdefault(cell, {})[entity] = None
+            self.spans[entity] = span
+
+    def clear(self) -> None:
+        self.cells.clear()
+        self.spans.clear()
+
+    def remove(self, entity) -> None:
+        for cell in self.covered(self.spans.pop(entity)):
+            bucket = self.cells[cell]
+            del bucket[entity]
+            if not bucket:
+                del self.cells[cell]
+
+    def nearby(self, rect: pygame.Rect) -> dict:
+        # every entity in the cells rect covers, each one once
+        found = {}
+        for cell in self.covered(self.span(rect)):
+            found.update(self.cells.get(cell, ()))
+
+        return found
+
+    def query(self, rect: pygame.Rect, exclude=None) -> list:
+        # entities whose rects overlap rect
+        return [
+            entity
+            for entity in self.nearby(rect)
+            if entity is not exclude and rect.colliderect(entity.rect)
+        ]
+
+    def nearest(self, position: tuple[int, int], radius: float, exclude=None):
+        # entity with its center closest to position, None if none is in radius
+        x, y = position
+        area = pygame.Rect(x - radius, y - radius, radius * 2 + 1, radius * 2 + 1)
+
+        best, best_distance = None, radius * radius
+        for entity in self.nearby(area):
+            if entity is exclude:
+                continue
+
+            center_x, center_y = entity.rect.center
+            distance = (center_x - x) ** 2 + (center_y - y) ** 2
+            if distance < best_distance or best is None and distance == best_distance:
+                best, best_distance = entity, distance
+
+        return best
+
+    def pairs(self) -> list[tuple]:
+        # overlapping pairs, each reported by the cell their overlap starts in
+        found = []
+        size = self.cell_size
+        for (cell_x, cell_y), bucket in self.cells.items():
+            entities = list(bucket)
+            for index, first in enumerate(entities):
+                for second in entities[index + 1 :]:
+                    overlap = first.rect.clip(second.rect)
+                    if not overlap:
+                        continue
+                    if (overlap.x // size, overlap.y // size) == (cell_x, cell_y):
+                        found.append((first, second))
+
+        return found
+
+    def __len__(self) -> int:
+        return len(self.spans)
+
+
+class LevelParams(NamedTuple):
+    """Settings a level is generated from, fixed when the level is asked for."""
+
+    width: int
+    height: int
+    algorithm: str
+    tunnels: int
+    coins: int
+
+    @classmethod
+    def current(cls) -> "LevelParams":
+        return cls(
+            st.SIZE_X, st.SIZE_Y, st.MAZE_ALGORITHM, st.HELP_AMOUNT, st.COIN_AMOUNT
+        )
+
+
+class Level:
+    # attributes plan() sets, everything prepare() needs to build the rest
+    PLANNED = ("params", "seed", "rng", "maze", "start_pos", "end_pos", "variants")
+
+    def __init__(self, seed: int = None, params: LevelParams = None):
+        self.load_tiles()
+        self.generate(seed, params)
+        self.compose()
+
+    def generate(self, seed: int = None, params: LevelParams = None) -> None:
+        # everything but the composited tiles, this makes no surfaces and can
+        # run off the main thread once load_tiles() has been called
+        self.plan(seed, params)
+        self.prepare()
+
+    def plan(self, seed: int = None, params: LevelParams = None) -> None:
+        # the maze, placements and tile variants, only plain data that can be
+        # pickled, so another process can make them. See PLANNED
+        self.params = params or LevelParams.current()
+
+        # every random choice of the level comes from this one stream
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+
+        maze_object = self.generate_maze(self.params.width, self.params.height)
+        self.maze, self.start_pos, self.end_pos = maze_object
+        self.variants = self.pick_variants()
+
+    @classmethod
+    def load(cls, path: str, index: int = 0) -> "Level":
+        # a level saved with save() or packed by levelfile.py, nothing is
+        # generated, but bats spawn from a fresh stream of the stored seed
+        level = cls.__new__(cls)
+        with levelfile.LevelPack(path) as pack:
+            record = pack[index]
+            level.seed = record.seed
+            level.maze = record.grid()
+            level.start_pos, level.end_pos = record.start, record.end
+            level.variants = record.variants()
+
+        # the pack doesn't keep the algorithm, tunnels and coins are counted
+        cells = level.maze.cells
+        level.params = LevelParams(
+            record.width,
+            record.height,
+            st.MAZE_ALGORITHM,
+            cells.count(TUNNEL),
+            cells.count(COIN),
+        )
+
+        level.rng = random.Random(level.seed)
+        level.load_tiles()
+        level.prepare()
+        level.compose()
+        return level
+
+    def save(self, path: str) -> None:
+        levelfile.save([self], path)
+
+    def pick_variants(self) -> bytearray:
+        # index of the chosen tile in its tile set, tunnels keep the
+        # background in the low and the tunnel in the high four bits
+        variants = bytearray(len(self.maze))
+        for index, (coord, col) in enumerate(self.maze.items()):
+            if col == WALL:
+                variants[index] = self.rng.randrange(len(self.wall_tiles(coord)))
+            elif col == TUNNEL:
+                background = self.rng.randrange(len(self.background_tiles))
+                tunnel = self.rng.randrange(len(self.tunnels_tiles))
+                variants[index] = background | tunnel << 4
+            else:
+                variants[index] = self.rng.randrange(len(self.background_tiles))
+
+        return variants
+
+    def prepare(self):
+        # plain tiles share the atlas handles, only composited ones are copied
+        # by compose()
         self.tile_selections = {}
-        for coord, col in self.maze.items():
-            if col in [0, 3]:  # Air or Coin
-                tile = random.choice(self.background_tiles).copy()
-                self.tile_selections[coord] = tile
-            elif col == 1:  # Wall
-                tile = self.get_wall_tile(coord).copy()
+        for (coord, col), variant in zip(self.maze.items(), self.variants):
+            if col in [AIR, COIN]:
+                tile = self.background_tiles[variant]
                 self.tile_selections[coord] = tile
-            if col == 2:  # Tunnel
-                tile = random.choice(self.background_tiles).copy()
-                tunnel = random.choice(self.tunnels_tiles).copy()
-                tile.blit(tunnel, (0, 0))
+            elif col == WALL:
+                tile = self.wall_tiles(coord)[variant]
                 self.tile_selections[coord] = tile
 
+        self.walls = []
+        self.tunnels = []
+        self.coins = CoinStore(st.TILE_SIZE)
+
+        self.wall_index = TileIndex(st.TILE_SIZE)
+        self.build_rects()
+
+        self.init_state()
+
+        # shared by every bat, points towards the player's tile
+        self.flow_field = FlowField(self.maze)
+
+        if st.ORACLE:
+            self.oracle = oracle.load_or_build(
+                self.maze,
+                st.ORACLE_CACHE_DIR,
+                st.ORACLE_FULL_LIMIT,
+                st.ORACLE_LANDMARKS,
+                st.ORACLE_CACHE_FILES,
+            )
+
+    def init_state(self) -> None:
+        # what every kind of level starts a run with, whatever its tiles are
+
+        # static tiles baked by region on first draw, see region()
+        self.baked: OrderedDict[tuple[int, int], pygame.Surface] = OrderedDict()
+
+        # the player and bats, kept up to date by the simulation every tick
+        self.entities = SpatialHash(st.ENTITY_CELL)
+
+        self.corridor_graph = None  # built on first use by get_corridor_graph
+        self.oracle = None
+
+        self.frame = 0
+
+        # boxes a bat last planned between, for the debug drawing in draw()
+        self.from_box = None
+        self.to_box = None
+        self.to_boxes = []
+
+    def compose(self):
+        # the few tiles drawn from two images, made on the main thread
+        for rect in self.tunnels:
+            coord = self.tile_pos(rect.topleft)
+            variant = self.variants[coord[1] * self.maze.width + coord[0]]
+            tile = self.background_tiles[variant & 15].copy()
+            tile.blit(self.tunnels_tiles[variant >> 4], (0, 0))
+            self.tile_selections[coord] = tile
+
         # blit the entrance to the start position
         new_entrance = self.tile_selections[self.start_pos].copy()
-        new_entrance.blit(entrance_image, (0, 0))
+        new_entrance.blit(self.entrance_image, (0, 0))
         self.tile_selections[self.start_pos] = new_entrance
 
         # blit the exit to the end position
         new_exit = self.tile_selections[self.end_pos].copy()
-        new_exit.blit(exit_image, (0, 0))
+        new_exit.blit(self.exit_image, (0, 0))
         self.tile_selections[self.end_pos] = new_exit
 
-        self.walls = []
-        self.tunnels = []
-        self.coins = []
-
-        self.frame = 0
+    def load_tiles(self):
+        path = f"tilesets{os.sep}"
+        self.background_tiles = load_spritesheet(f"{path}background", [16] * 2)
+        self.left_right_tiles = load_spritesheet(f"{path}left_right", [16] * 2)
+        self.up_down_tiles = load_spritesheet(f"{path}up_down", [16] * 2)
+        self.tunnels_tiles = load_spritesheet(f"{path}tunnels", [16] * 2)
 
-        self.from_box = None  # TODO
-        self.to_box = None
-        self.to_boxes = []
+        self.coin_image = load_image(f"{path}coin")
+        self.entrance_image = load_image(f"{path}entrance")
+        self.exit_image = load_image(f"{path}exit")
 
     def absoulte_pos(self, pos):
-        if isinstance(pos, str):
-            pos = pos.split(";")
-            x, y = int(pos[0]), int(pos[1])
-        elif isinstance(pos, tuple):
-            x, y = pos
+        x, y = parse_coord(pos)
 
         return x * st.TILE_SIZE, y * st.TILE_SIZE
 
-    def draw(self, screen):
-        size_2d = (st.TILE_SIZE, st.TILE_SIZE)
-
-        if not self.walls:
-            for coord, col in self.maze.items():
-                if col == 0:
-                    continue
-
-                rect = pygame.Rect(self.absoulte_pos(coord), size_2d)
-
-                if col == 1:
-                    self.walls.append(rect)
-                elif col == 2:
-                    self.tunnels.append(rect)
-                elif col == 3:
-                    self.coins.append(rect)
-
-            # add boundary walls
-            for x in range(st.SIZE_X):
-                self.walls.extend(
-                    [
-                        pygame.Rect(self.absoulte_pos((x, -1)), size_2d),  # U
-                        pygame.Rect(self.absoulte_pos((-1, x)), size_2d),  # L
-                        pygame.Rect(self.absoulte_pos((st.SIZE_X, x)), size_2d),  # R
-                        pygame.Rect(self.absoulte_pos((x, st.SIZE_Y)), size_2d),  # D
-                    ]
-                )
-
-        topleft_coins = [coin.topleft for coin in self.coins]
-
-        # Draw tiles based on the tile type
-        for coord, col in self.maze.items():
-            x, y = self.absoulte_pos(coord)
-            tile = self.tile_selections.get(coord)
-            screen.blit(tile, (x, y))
-
-            if col == 3 and (x, y) in topleft_coins:  # Coin
-                screen.blit(self.coin_image, (x, y))
+    def tile_pos(self, pos):
+        x, y = pos
+
+        return round(x / st.TILE_SIZE), round(y / st.TILE_SIZE)
+
+    def draw(
+        self, screen, areas: list[pygame.Rect] = None, origin: tuple[int, int] = (0, 0)
+    ) -> list[pygame.Rect]:
+        # repaints the given screen areas plus the tiles of picked up coins and
+        # returns those coin tiles on screen, or the whole screen if areas is None
+        origin_x, origin_y = origin
+        cleared = [coin.move(-origin_x, -origin_y) for coin in self.coins.cleared]
+        self.coins.cleared = []
+
+        if areas is None:
+            screen.fill((0, 0, 0))  # around mazes smaller than the screen
+            areas, cleared = [screen.get_rect()], []
+        else:
+            areas = areas + cleared
+
+        # Copy each area from the baked regions, then draw the coins left on it
+        span = self.region_tiles() * st.TILE_SIZE
+        for area in areas:
+            world = area.move(origin)
+            for region_x, region_y in self.regions(world, span):
+                surface = self.region(region_x, region_y)
+                left, top = region_x * span, region_y * span
+                part = world.clip(pygame.Rect((left, top), surface.get_size()))
+                if part:
+                    position = part.x - origin_x, part.y - origin_y
+                    screen.blit(surface, position, part.move(-left, -top))
+
+        for area in areas:
+            for coin in self.coins.query(area.move(origin)):
+                screen.blit(self.coin_image, (coin.x - origin_x, coin.y - origin_y))
 
         # Additional drawing logic (such as drawing start/end positions, test boxes, etc.)
         self.frame += 1
@@ -131,41 +413,94 @@ class Level:
         # if self.to_box:
         #     pygame.draw.rect(screen, (255, 0, 100), pygame.Rect((self.to_box), size_2d))
 
+        return cleared
+
+    def region_tiles(self) -> int:
+        # tiles per side of a baked region, a maze that fits is one region
+        if self.maze is not None:
+            return min(st.BAKE_REGION, max(self.maze.width, self.maze.height))
+        return st.BAKE_REGION
+
+    def regions(self, rect: pygame.Rect, span: int) -> list[tuple[int, int]]:
+        # regions under a rect in pixels, only those inside a fixed maze
+        left, right = rect.left // span, (rect.right - 1) // span
+        top, bottom = rect.top // span, (rect.bottom - 1) // span
+        if self.maze is not None:
+            tiles = span // st.TILE_SIZE
+            left, top = max(left, 0), max(top, 0)
+            right = min(right, (self.maze.width - 1) // tiles)
+            bottom = min(bottom, (self.maze.height - 1) // tiles)
+
+        return [
+            (x, y) for y in range(top, bottom + 1) for x in range(left, right + 1)
+        ]
+
+    def region(self, region_x: int, region_y: int) -> pygame.Surface:
+        # the static tiles of one region in one surface, coins are drawn on
+        # top. At most BAKE_CACHE regions are kept, evicted ones are rebaked
+        key = region_x, region_y
+        surface = self.baked.get(key)
+        if surface is not None:
+            self.baked.move_to_end(key)
+            return surface
+
+        size, tiles = st.TILE_SIZE, self.region_tiles()
+        left, top = region_x * tiles, region_y * tiles
+        width = height = tiles
+        if self.maze is not None:  # regions on the far edges are cut short
+            width = min(tiles, self.maze.width - left)
+            height = min(tiles, self.maze.height - top)
+
+        surface = pygame.Surface((width * size, height * size))
+        if pygame.display.get_surface() is not None:
+            surface = surface.convert()
+
+        get = self.tile_selections.get
+        blits = []
+        for y in range(top, top + height):
+            for x in range(left, left + width):
+                tile = get((x, y))
+                if tile is not None:
+                    blits.append((tile, ((x - left) * size, (y - top) * size)))
+        surface.blits(blits, False)
+
+        self.baked[key] = surface
+        while len(self.baked) > st.BAKE_CACHE:
+            self.baked.popitem(last=False)
+
+        return surface
+
+    def build_rects(self):
+        size_2d = (st.TILE_SIZE, st.TILE_SIZE)
+
+        for coord, col in self.maze.items():
+            if col == AIR:
+                continue
+
+            rect = pygame.Rect(self.absoulte_pos(coord), size_2d)
+
+            if col == WALL:
+                self.walls.append(rect)
+                self.wall_index.add(coord, rect)
+            elif col == TUNNEL:
+                self.tunnels.append(rect)
+            elif col == COIN:
+                self.coins.add(coord, rect)
+
+        # add boundary walls, including the corners
+        width, height = self.maze.width, self.maze.height
+        boundary = [(x, y) for x in range(-1, width + 1) for y in (-1, height)]
+        boundary += [(x, y) for x in (-1, width) for y in range(height)]
+
+        for coord in boundary:
+            rect = pygame.Rect(self.absoulte_pos(coord), size_2d)
+            self.walls.append(rect)
+            self.wall_index.add(coord, rect)
+
     def generate_maze(self, width, height):
-        # Initialize the maze dict with 1's (walls)
-        maze = {}
-        for x in range(width):
-            for y in range(height):
-                maze[f"{x};{y}"] = 1
-
-        # Define function to carve paths
-        def carve(x, y):
-            # Define the 4 directions (up, right, down, left)
-            dir = [(0, -1), (1, 0), (0, 1), (-1, 0)]
-            random.shuffle(dir)  # Randomize the directions
-
-            # Carve paths in the random directions
-            for dx, dy in dir:
-                nx, ny = x + dx * 2, y + dy * 2
-                if 0 <= nx < width and 0 <= ny < height and maze.get(f"{nx};{ny}") == 1:
-                    maze[f"{nx};{ny}"] = 0
-                    maze[f"{x + dx};{y + dy}"] = 0
-                    carve(nx, ny)
-
-        # Random starting position
-        start_x, start_y = random.randint(0, width - 1), random.randint(0, height - 1)
-        maze[f"{start_x};{start_y}"] = 0
-        carve(start_x, start_y)
-
-        # Determine the ending position far from the start
-        end_x, end_y = start_x, start_y
-        while (abs(start_x - end_x) + abs(start_y - end_y)) < max(
-            width, height
-        ) / 2 or maze.get(f"{end_x};{end_y}") == 1:
-            end_x, end_y = random.randint(0, width - 1), random.randint(0, height - 1)
-
-        start_pos = f"{start_x};{start_y}"
-        end_pos = f"{end_x};{end_y}"
+        maze, start_pos, end_pos = mazegen.generate(
+            width, height, self.params.algorithm, self.rng
+        )
 
         # Whitelist spots to make the maze easier
         maze = self.add_tunnels(maze, width, height)
@@ -175,39 +510,39 @@ class Level:
 
     def add_tunnels(self, maze, width, height):
         tunnels = 0
-        while tunnels < st.HELP_AMOUNT:
-            coord = random.randint(0, width - 1), random.randint(0, height - 1)
-            random_x, random_y = coord
+        while tunnels < self.params.tunnels:
+            random_x = self.rng.randint(0, width - 1)
+            random_y = self.rng.randint(0, height - 1)
 
             # Check if the selected cell is a wall
-            if maze.get(f"{random_x};{random_y}") != 1:
+            if maze.get(random_x, random_y) != WALL:
                 continue
 
             # Check surrounding cells
-            left = maze.get(f"{random_x - 1};{random_y}", -1)  # Left cell
-            right = maze.get(f"{random_x + 1};{random_y}", -1)  # Right cell
-            up = maze.get(f"{random_x};{random_y - 1}", -1)  # Upper cell
-            down = maze.get(f"{random_x};{random_y + 1}", -1)  # Lower cell
+            left = maze.get(random_x - 1, random_y, -1)  # Left cell
+            right = maze.get(random_x + 1, random_y, -1)  # Right cell
+            up = maze.get(random_x, random_y - 1, -1)  # Upper cell
+            down = maze.get(random_x, random_y + 1, -1)  # Lower cell
 
             # Check for proper tunnel conditions
             horizontal_cond = left == 1 and right == 1 and up == 0 and down == 0
             vertical_cond = up == 1 and down == 1 and left == 0 and right == 0
 
             if horizontal_cond or vertical_cond:
-                maze[f"{random_x};{random_y}"] = 2
+                maze.set(random_x, random_y, TUNNEL)
                 tunnels += 1
 
         return maze
 
     def add_coins(self, maze, width, height):
         coins = 0
-        while coins < st.COIN_AMOUNT:
-            coord = random.randint(0, width - 1), random.randint(0, height - 1)
-            random_x, random_y = coord
+        while coins < self.params.coins:
+            random_x = self.rng.randint(0, width - 1)
+            random_y = self.rng.randint(0, height - 1)
 
             # Check if the selected cell is an air spot
-            if maze.get(f"{random_x};{random_y}") == 0:
-                maze[f"{random_x};{random_y}"] = 3  # 3 represents a coin
+            if maze.get(random_x, random_y) == AIR:
+                maze.set(random_x, random_y, COIN)
                 coins += 1
 
         return maze
@@ -215,34 +550,35 @@ class Level:
     def get_random_pos(self):
         # can only get random air tiles
         while True:
-            pos = random.choice(list(self.maze.keys()))
-            item = self.maze.get(pos)
+            x = self.rng.randrange(self.maze.width)
+            y = self.rng.randrange(self.maze.height)
 
-            if item == 0:
-                return pos
+            if self.maze.get(x, y) == AIR:
+                return x, y
 
     def get_grid(self):
-        grid = []
-        for y in range(st.SIZE_Y):
-            row = []
-            for x in range(st.SIZE_X):
-                cell = self.maze.get(f"{x};{y}")
-                row.append(1 if cell == 1 else 0)  # 0 for passable, 1 for walls
-            grid.append(row)
+        # 0 for passable, 1 for walls
+        return self.maze.wall_rows()
+
+    def get_corridor_graph(self):
+        if self.corridor_graph is None:
+            self.corridor_graph = CorridorGraph(self.maze)
 
-        # print(grid)
-        return grid
+        return self.corridor_graph
 
     def get_wall_tile(self, coord):
-        # Check neighboring tiles to determine the correct wall tile
-        left = self.maze.get(f"{int(coord.split(';')[0]) - 1};{coord.split(';')[1]}")
-        right = self.maze.get(f"{int(coord.split(';')[0]) + 1};{coord.split(';')[1]}")
-        up = self.maze.get(f"{coord.split(';')[0]};{int(coord.split(';')[1]) - 1}")
-        down = self.maze.get(f"{coord.split(';')[0]};{int(coord.split(';')[1]) + 1}")
-
-        if down == 0:
-            return random.choice(self.up_down_tiles)
-        if left == 0 and right == 0:
-            return random.choice(self.left_right_tiles)
-
-        return random.choice(self.left_right_tiles)
+        return self.rng.choice(self.wall_tiles(coord))
+
+    def wall_tiles(self, coord):
+        # Check neighboring tiles to determine the correct wall tile set
+        x, y = parse_coord(coord)
+        left = self.maze.get(x - 1, y)
+        right = self.maze.get(x + 1, y)
+        down = self.maze.get(x, y + 1)
+
+        if down == AIR:
+            return self.up_down_tiles
+        if left == AIR and right == AIR:
+            return self.left_right_tiles
+
+        return self.left_right_tiles
@@ -0,0 +1,245 @@
+import argparse
+import mmap
+import os
+import struct
+import sys
+from itertools import compress
+
+if __name__ == "__main__":
+    # packing levels never opens a window
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import settings as st
+from grid import AIR, COIN, TUNNEL, WALL, Grid
+
+MAGIC = b"MMLP"
+VERSION = 2
+HEADER = struct.Struct("<4sBI")  # magic, version, level count
+OFFSET = struct.Struct("<Q")  # start of each record, plus the end of the last
+# width, height, start x, start y, end x, end y, seed, wall and tunnel count,
+# then the bits per variant of floors, walls and tunnels
+RECORD = struct.Struct("<HHHHHHQIIBBB")
+
+# floor (air and coin), wall and tunnel variants are kept in separate runs,
+# each packed in as few bits as its largest variant needs
+KINDS = ((AIR, COIN), (WALL,), (TUNNEL,))
+WIDTHS = (1, 2, 4, 8)
+
+
+def pack_bits(values: bytes, bits: int) -> bytes:
+    # values below 2 ** bits, 8 // bits per byte with the first in the lowest
+    # bits. Every slot of the bytes is shifted in with one translate
+    per_byte = 8 // bits
+    padded = bytes(values) + bytes(-len(values) % per_byte)
+    packed = 0
+    for slot in range(per_byte):
+        table = bytes(value << slot * bits & 255 for value in range(256))
+        packed |= int.from_bytes(padded[slot::per_byte].translate(table), "little")
+    return packed.to_bytes(len(padded) // per_byte, "little")
+
+
+def unpack_bits(packed, bits: int, count: int) -> bytearray:
+    per_byte = 8 // bits
+    mask = (1 << bits) - 1
+    packed = bytes(packed)
+    values = bytearray(len(packed) * per_byte)
+    for slot in range(per_byte):
+        table = bytes(byte >> slot * bits & mask for byte in range(256))
+        values[slot::per_byte] = packed.translate(table)
+    del values[count:]
+    return values
+
+
+def packed_size(count: int, bits: int) -> int:
+    per_byte = 8 // bits
+    return (count + per_byte - 1) // per_byte
+
+
+def bits_for(values: bytes) -> int:
+    # the fewest bits of WIDTHS that hold every value
+    bits = max(values, default=0).bit_length()
+    return next(width for width in WIDTHS if width >= bits)
+
+
+class LevelRecord:
+    """One level of a pack, read from the mapped file on access.
+
+    cell() reads the packed grid in place. grid() and variants() unpack
+    into new buffers of a byte per cell, the layout Grid and its users
+    index, so the pack can be closed once they have been read.
+    """
+
+    def __init__(self, data: memoryview, start: int, end: int) -> None:
+        fields = RECORD.unpack_from(data, start)
+        self.width, self.height = fields[0:2]
+        self.start = fields[2:4]
+        self.end = fields[4:6]
+        self.seed = fields[6]
+        walls, tunnels = fields[7:9]
+        self.widths = fields[9:12]
+
+        # the pack's view and where each part of this record starts in it
+        self.data = data
+        self.count = self.width * self.height
+        self.counts = self.count - walls - tunnels, walls, tunnels
+        self.offsets = [start + RECORD.size]
+        self.offsets.append(self.offsets[0] + packed_size(self.count, 2))
+        for count, bits in zip(self.counts, self.widths):
+            self.offsets.append(self.offsets[-1] + packed_size(count, bits))
+        if self.offsets[-1] != end:
+            raise ValueError("Level record has the wrong size")
+
+    def cell(self, x: int, y: int) -> int:
+        # straight from the packed bytes, without unpacking the grid
+        index = y * self.width + x
+        return self.data[self.offsets[0] + (index >> 2)] >> (index & 3) * 2 & 3
+
+    def cells(self) -> bytearray:
+        return unpack_bits(self.data[self.offsets[0] : self.offsets[1]], 2, self.count)
+
+    def grid(self) -> Grid:
+        grid = Grid(self.width, self.height)
+        grid.cells = self.cells()
+        return grid
+
+    def variants(self) -> bytearray:
+        # every run unpacked, then dealt out to the cells of its kind in order
+        runs = []
+        for kind, (count, bits) in enumerate(zip(self.counts, self.widths)):
+            start, end = self.offsets[kind + 1 : kind + 3]
+            runs.append(iter(unpack_bits(self.data[start:end], bits, count)))
+
+        by_cell = [None] * 4
+        for run, cells in zip(runs, KINDS):
+            for cell in cells:
+                by_cell[cell] = run
+        return bytearray(map(next, map(by_cell.__getitem__, self.cells())))
+
+
+class LevelPack:
+    """Read-only memory map of a level pack, records are decoded on access.
+
+    The file is mapped rather than read, so opening a pack costs the same
+    however many levels it holds and processes share its pages. Close it,
+    or use it in a with block, to unmap the file.
+    """
+
+    def __init__(self, path: str) -> None:
+        # an empty file can't be mapped at all, so sizes are checked first
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size < HEADER.size:
+                raise ValueError(f"Not a level pack: {path}")
+            self.map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.data = memoryview(self.map)
+
+        magic, version, self.count = HEADER.unpack_from(self.data)
+        offsets_end = HEADER.size + OFFSET.size * (self.count + 1)
+        if magic != MAGIC or version != VERSION or len(self.data) < offsets_end:
+            self.close()
+            raise ValueError(f"Not a level pack: {path}")
+
+    def close(self) -> None:
+        # records read after this raise ValueError
+        self.data.release()
+        self.map.close()
+
+    def __enter__(self) -> "LevelPack":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> LevelRecord:
+        if not 0 <= index < self.count:
+            raise IndexError(index)
+
+        start, end = struct.unpack_from(
+            "<2Q", self.data, HEADER.size + index * OFFSET.size
+        )
+        if not start + RECORD.size <= end <= len(self.data):
+            raise ValueError(f"Level {index} of the pack is cut off")
+        return LevelRecord(self.data, start, end)
+
+    def __iter__(self):
+        for index in range(self.count):
+            yield self[index]
+
+
+def encode(level) -> bytes:
+    maze = level.maze
+    cells, variants = bytes(maze.cells), bytes(level.variants)
+
+    runs = []
+    for kind in KINDS:
+        selected = bytes(1 if cell in kind else 0 for cell in range(256))
+        runs.append(bytes(compress(variants, cells.translate(selected))))
+    widths = [bits_for(run) for run in runs]
+
+    header = RECORD.pack(
+        maze.width,
+        maze.height,
+        *level.start_pos,
+        *level.end_pos,
+        level.seed,
+        cells.count(WALL),
+        cells.count(TUNNEL),
+        *widths,
+    )
+    packed = [pack_bits(run, bits) for run, bits in zip(runs, widths)]
+    return header + pack_bits(cells, 2) + b"".join(packed)
+
+
+def save(levels, path: str) -> None:
+    # levels can be a generator, only their encoded records are kept around
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    records = [encode(level) for level in levels]
+
+    offset = HEADER.size + OFFSET.size * (len(records) + 1)
+    with open(path, "wb") as file:
+        file.write(HEADER.pack(MAGIC, VERSION, len(records)))
+        for record in records:
+            file.write(OFFSET.pack(offset))
+            offset += len(record)
+        file.write(OFFSET.pack(offset))
+
+        for record in records:
+            file.write(record)
+
+
+def main(argv=None):
+    from level import Level
+
+    parser = argparse.ArgumentParser(description="Pack or inspect level packs.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    pack = commands.add_parser("pack", help="generate levels into a pack")
+    pack.add_argument("path")
+    pack.add_argument("--count", type=int, default=100)
+    pack.add_argument("--seed", type=int, default=0, help="seed of the first level")
+    pack.add_argument("--size", default=f"{st.SIZE_X}x{st.SIZE_Y}", help="WxH")
+
+    info = commands.add_parser("info", help="list the levels in a pack")
+    info.add_argument("path")
+    args = parser.parse_args(argv)
+
+    if args.command == "pack":
+        st.SIZE_X, st.SIZE_Y = (int(n) for n in args.size.split("x"))
+        seeds = range(args.seed, args.seed + args.count)
+        save((Level(seed) for seed in seeds), args.path)
+        print(f"packed {args.count} levels into {args.path}", file=sys.stderr)
+        return
+
+    with LevelPack(args.path) as pack:
+        for index, record in enumerate(pack):
+            print(
+                f"{index}: seed {record.seed} {record.width}x{record.height} "
+                f"start {record.start} end {record.end}"
+            )
+
+
+if __name__ == "__main__":
+    main()
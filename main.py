@@ -3,7 +3,7 @@ import sys
 import game
 import pygame
 import settings as st
-from utils import button
+from ui import Button, render_text
 
 pygame.init()
 
@@ -15,50 +15,65 @@ GREEN = (0, 255, 0)
 RED = (255, 0, 0)
 
 
+def draw(screen, win_text, buttons):
+    width = screen.get_width()
+    screen.fill(BLACK)
+
+    # Display game name
+    text_render = render_text("Mining Mazers", 80, WHITE)
+    screen.blit(text_render, (width // 2 - text_render.get_width() // 2, 50))
+
+    #  Display win text
+    text_render = render_text(win_text, 50, WHITE)
+    screen.blit(text_render, (width // 2 - text_render.get_width() // 2, 150))
+
+    # Buttons
+    for button in buttons:
+        button.draw(screen)
+
+    pygame.display.flip()
+
+
 def main():
     # Initialize Pygame
     width, height = st.WINDOW_WIDTH, st.WINDOW_HEIGHT
     screen = pygame.display.set_mode((width, height))
-    clock = pygame.time.Clock()
 
     start_pos = (width // 2, height // 2 - 50)
     end_pos = (width // 2, height // 2 + 50)
     button_size = (200, 50)
     win_text = ""
 
-    while True:
-        screen.fill(BLACK)
-
-        # Display game name
-        font = pygame.font.SysFont("Arial", 80)
-        text_render = font.render("Mining Mazers", True, WHITE)
-        screen.blit(text_render, (width // 2 - text_render.get_width() // 2, 50))
+    start_button = Button("Start", start_pos, button_size, 40, WHITE, GREEN)
+    exit_button = Button("Exit", end_pos, button_size, 40, WHITE, RED)
+    buttons = start_button, exit_button
 
-        #  Display win text
-        font = pygame.font.SysFont("Arial", 50)
-        text_render = font.render(win_text, True, WHITE)
-        screen.blit(text_render, (width // 2 - text_render.get_width() // 2, 150))
-
-        # Buttons
-        start_button = button(screen, "Start", start_pos, button_size, 40, WHITE, GREEN)
-        exit_button = button(screen, "Exit", end_pos, button_size, 40, WHITE, RED)
+    redraw = True
+    while True:
+        if redraw:
+            draw(screen, win_text, buttons)
+            redraw = False
 
-        mouse = pygame.mouse.get_pos()
+        # Sleep until something happens, the menu only changes on input
+        event = pygame.event.wait()
 
-        # Event loop
-        for event in pygame.event.get():
-            if event.type == pygame.QUIT:
+        if event.type == pygame.QUIT:
+            pygame.quit()
+            sys.exit()
+        if event.type == pygame.MOUSEMOTION:
+            # any() would stop at the first button that changed
+            redraw = sum(button.hover(event.pos) for button in buttons) > 0
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            if start_button.rect.collidepoint(event.pos):
+                win_text = game.main() or ""
+                for button in buttons:
+                    button.hover(pygame.mouse.get_pos())
+                redraw = True
+            if exit_button.rect.collidepoint(event.pos):
                 pygame.quit()
                 sys.exit()
-            if event.type == pygame.MOUSEBUTTONDOWN:
-                if start_button.collidepoint(mouse):
-                    win_text = game.main() or ""
-                if exit_button.collidepoint(mouse):
-                    pygame.quit()
-                    sys.exit()
-
-        pygame.display.flip()
-        clock.tick(60)
+        if event.type in (pygame.WINDOWEXPOSED, pygame.VIDEOEXPOSE):
+            redraw = True
 
 
 if __name__ == "__main__":
@@ -0,0 +1,229 @@
+import random
+from array import array
+
+from grid import AIR, WALL, Grid
+
+# Every generator carves passages on the lattice of cells that share the
+# parity of the start cell, so walls between two lattice cells are the odd
+# steps in between. This is the same layout the old recursive carve produced.
+
+# translation table from 1 for walls and 0 for passages back to cell values
+_FROM_WALLS = bytes((AIR, WALL)) + bytes(254)
+
+
+def _lattice(maze: Grid, start: tuple[int, int]) -> tuple[range, range]:
+    xs = range(start[0] % 2, maze.width, 2)
+    ys = range(start[1] % 2, maze.height, 2)
+    return xs, ys
+
+
+def carve_backtracker(maze: Grid, start: tuple[int, int], rng=random) -> None:
+    # Depth-first recursive backtracker with an explicit stack of cell indices.
+    # It carves a copy padded with two passable cells on every side, so the
+    # four neighbour checks need no bounds checks, and copies the rows back
+    width, height = maze.width, maze.height
+    rand = rng.random
+
+    padded_width = width + 4
+    walls = maze.wall_bytes()
+    padded = bytearray(padded_width * (height + 4))  # 1 for walls
+    for y in range(height):
+        offset = (y + 2) * padded_width + 2
+        padded[offset : offset + width] = walls[y * width : (y + 1) * width]
+
+    # steps to the lattice neighbours up, right, down and left, and for each
+    # bit mask of the uncarved ones the steps that are left to choose from
+    steps = (-2 * padded_width, 2, 2 * padded_width, -2)
+    up, right, down, left = steps
+    options_by_mask = [
+        tuple(step for bit, step in enumerate(steps) if mask >> bit & 1)
+        for mask in range(16)
+    ]
+
+    index = (start[1] + 2) * padded_width + start[0] + 2
+    padded[index] = 0
+    stack = [index]
+    push, pop = stack.append, stack.pop
+
+    while stack:
+        index = pop()
+        while True:
+            options = options_by_mask[
+                padded[index + up]
+                | padded[index + right] << 1
+                | padded[index + down] << 2
+                | padded[index + left] << 3
+            ]
+            if not options:
+                break
+
+            # a cell with a single way on has none left once we come back
+            count = len(options)
+            step = options[int(rand() * count)]
+            if count > 1:
+                push(index)
+
+            padded[index + step // 2] = 0
+            index += step
+            padded[index] = 0
+
+    cells = maze.cells
+    for y in range(height):
+        offset = (y + 2) * padded_width + 2
+        row = padded[offset : offset + width]
+        cells[y * width : (y + 1) * width] = row.translate(_FROM_WALLS)
+
+
+def carve_kruskal(maze: Grid, start: tuple[int, int], rng=random) -> None:
+    # Randomised Kruskal: join lattice cells through shuffled walls (union-find)
+    width = maze.width
+    cells = maze.cells
+    rand = rng.random
+    xs, ys = _lattice(maze, start)
+    cols, rows = len(xs), len(ys)
+    ox, oy = xs.start, ys.start
+    count = cols * rows
+
+    for y in ys:
+        cells[y * width + ox : (y + 1) * width : 2] = bytes(cols)
+
+    # edges below count join that cell to the one on its right, the others
+    # join edge - count to the cell below
+    edges = array("i")
+    for row in range(rows):
+        edges.extend(range(row * cols, (row + 1) * cols - 1))
+    edges.extend(range(count, count * 2 - cols))
+
+    # Fisher-Yates in place
+    for last in range(len(edges) - 1, 0, -1):
+        other = int(rand() * (last + 1))
+        edges[last], edges[other] = edges[other], edges[last]
+
+    parent = list(range(count))
+    size = [1] * count
+    joins = count - 1
+
+    for edge in edges:
+        if edge < count:
+            cell, other = edge, edge + 1
+        else:
+            cell = edge - count
+            other = cell + cols
+
+        # find both roots with path halving
+        root = cell
+        while parent[root] != root:
+            parent[root] = root = parent[parent[root]]
+        while parent[other] != other:
+            parent[other] = other = parent[parent[other]]
+
+        if root == other:
+            continue
+
+        # union by size keeps the trees shallow
+        if size[root] > size[other]:
+            root, other = other, root
+        parent[root] = other
+        size[other] += size[root]
+
+        row, col = divmod(cell, cols)
+        index = (oy + row * 2) * width + ox + col * 2
+        cells[index + 1 if edge < count else index + width] = AIR
+
+        joins -= 1
+        if not joins:  # every cell is connected, the rest would make loops
+            break
+
+
+def carve_eller(maze: Grid, start: tuple[int, int], rng=random) -> None:
+    # Eller's algorithm: one lattice row at a time, tracking sets per row
+    width = maze.width
+    cells = maze.cells
+    rand = rng.random
+    xs, ys = _lattice(maze, start)
+    cols, rows = len(xs), len(ys)
+    ox = xs.start
+
+    next_set = 0
+    row_sets = [None] * cols
+    members: dict[int, list[int]] = {}
+
+    for row, y in enumerate(ys):
+        offset = y * width + ox
+        last_row = row == rows - 1
+
+        # Cells that were not joined from above start in their own set
+        cells[offset : (y + 1) * width : 2] = bytes(cols)
+        for col in range(cols):
+            if row_sets[col] is None:
+                row_sets[col] = next_set
+                members[next_set] = [col]
+                next_set += 1
+
+        # Randomly join horizontal neighbours in different sets
+        for col in range(cols - 1):
+            left, right = row_sets[col], row_sets[col + 1]
+            if left == right or not (last_row or rand() < 0.5):
+                continue
+
+            cells[offset + col * 2 + 1] = AIR
+
+            if len(members[left]) < len(members[right]):
+                left, right = right, left
+            moved = members.pop(right)
+            for member in moved:
+                row_sets[member] = left
+            members[left].extend(moved)
+
+        if last_row:
+            break
+
+        # Every set carves at least one passage down into the next row
+        row_sets = [None] * cols
+        next_members: dict[int, list[int]] = {}
+        for set_id, set_cols in members.items():
+            carved = [set_cols[int(rand() * len(set_cols))]]
+            for col in set_cols:
+                if col != carved[0] and rand() < 0.5:
+                    carved.append(col)
+
+            for col in carved:
+                cells[offset + width + col * 2] = AIR
+                row_sets[col] = set_id
+            next_members[set_id] = carved
+
+        members = next_members
+
+
+GENERATORS = {
+    "backtracker": carve_backtracker,
+    "kruskal": carve_kruskal,
+    "eller": carve_eller,
+}
+
+
+def find_end(maze: Grid, start: tuple[int, int], rng=random) -> tuple[int, int]:
+    # Determine the ending position far from the start
+    width, height = maze.width, maze.height
+    start_x, start_y = start
+
+    end_x, end_y = start_x, start_y
+    while (abs(start_x - end_x) + abs(start_y - end_y)) < max(
+        width, height
+    ) / 2 or maze.get(end_x, end_y) == WALL:
+        end_x, end_y = rng.randint(0, width - 1), rng.randint(0, height - 1)
+
+    return end_x, end_y
+
+
+def generate(width: int, height: int, algorithm: str = "backtracker", rng=random):
+    if algorithm not in GENERATORS:
+        raise ValueError(f"Unknown maze algorithm: {algorithm}")
+
+    maze = Grid(width, height, WALL)
+
+    # Random starting position
+    start = rng.randint(0, width - 1), rng.randint(0, height - 1)
+    GENERATORS[algorithm](maze, start, rng)
+
+    return maze, start, find_end(maze, start, rng)
@@ -0,0 +1,363 @@
+import hashlib
+import os
+import struct
+import tempfile
+from array import array
+from collections import OrderedDict, deque
+from heapq import heappop, heappush
+
+from grid import WALL, Grid
+from pathfinder import get_workspace
+
+# the full table stores one of these direction codes (up, down, left, right)
+# per pair, or NO_HOP for "no path / already there"
+DIRECTIONS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+NO_HOP = 255
+
+MAGIC = b"MMOR"
+VERSION = 1
+FULL, LANDMARKS = 0, 1
+HEADER = struct.Struct("<4sBBHHI")  # magic, version, kind, width, height, count
+
+
+def _bfs(maze: Grid, source: int) -> tuple[list[int], list[int]]:
+    # distance and the cell we came from, for every cell reachable from source
+    width, cells = maze.width, maze.cells
+    size = len(cells)
+
+    distance = [-1] * size
+    came_from = [-1] * size
+    distance[source] = 0
+    queue = deque([source])
+
+    while queue:
+        index = queue.popleft()
+        step = distance[index] + 1
+        x = index % width
+
+        neighbours = []
+        if index >= width:
+            neighbours.append(index - width)
+        if index + width < size:
+            neighbours.append(index + width)
+        if x > 0:
+            neighbours.append(index - 1)
+        if x < width - 1:
+            neighbours.append(index + 1)
+
+        for other in neighbours:
+            if distance[other] == -1 and cells[other] != WALL:
+                distance[other] = step
+                came_from[other] = index
+                queue.append(other)
+
+    return distance, came_from
+
+
+def _direction(width: int, index: int, other: int) -> int:
+    offset = other - index
+    if offset == -width:
+        return 0
+    if offset == width:
+        return 1
+    if offset == -1:
+        return 2
+    return 3
+
+
+class FullTable:
+    """Next hop between every pair of open cells, one byte per pair."""
+
+    kind = FULL
+
+    def __init__(self, maze: Grid, hops: bytearray = None) -> None:
+        self.maze = maze
+        self.open_cells = [i for i, cell in enumerate(maze.cells) if cell != WALL]
+        self.slot = array("i", [-1]) * len(maze.cells)
+        for slot, index in enumerate(self.open_cells):
+            self.slot[index] = slot
+
+        count = len(self.open_cells)
+        self.hops = hops if hops is not None else bytearray([NO_HOP]) * count**2
+
+    def build(self) -> None:
+        width, count = self.maze.width, len(self.open_cells)
+
+        for target_slot, target in enumerate(self.open_cells):
+            _, came_from = _bfs(self.maze, target)
+            row = target_slot * count
+
+            for slot, index in enumerate(self.open_cells):
+                parent = came_from[index]
+                if parent != -1:
+                    self.hops[row + slot] = _direction(width, index, parent)
+
+    def next_step(self, start: tuple[int, int], target: tuple[int, int]):
+        maze = self.maze
+        if not (maze.in_bounds(*start) and maze.in_bounds(*target)):
+            return None
+
+        slot = self.slot[start[1] * maze.width + start[0]]
+        target_slot = self.slot[target[1] * maze.width + target[0]]
+        if slot == -1 or target_slot == -1:
+            return None
+
+        hop = self.hops[target_slot * len(self.open_cells) + slot]
+        if hop == NO_HOP:
+            return None
+
+        dx, dy = DIRECTIONS[hop]
+        return start[0] + dx, start[1] + dy
+
+    def payload(self) -> bytes:
+        return bytes(self.hops)
+
+
+class LandmarkTable:
+    """ALT distances from a few landmarks, used as an A* heuristic."""
+
+    kind = LANDMARKS
+
+    def __init__(self, maze: Grid, distances: list[array] = None) -> None:
+        self.maze = maze
+        self.distances = distances or []
+        self.paths: OrderedDict[int, dict[int, int]] = OrderedDict()
+
+    def build(self, count: int) -> None:
+        # farthest point selection, starting from the first open cell
+        open_cells = [i for i, cell in enumerate(self.maze.cells) if cell != WALL]
+        if not open_cells:
+            return
+
+        landmark = open_cells[0]
+        nearest = None
+        for _ in range(count):
+            distance, _ = _bfs(self.maze, landmark)
+            self.distances.append(array("i", distance))
+
+            if nearest is None:
+                nearest = distance
+            else:
+                nearest = [min(a, b) for a, b in zip(nearest, distance)]
+            landmark = max(open_cells, key=nearest.__getitem__)
+
+    def heuristic(self, index: int, target: int) -> int:
+        best = 0
+        for distance in self.distances:
+            a, b = distance[index], distance[target]
+            if a != -1 and b != -1 and abs(a - b) > best:
+                best = abs(a - b)
+        return best
+
+    def search(self, start: int, target: int) -> dict[int, int] | None:
+        width, cells = self.maze.width, self.maze.cells
+        size = len(cells)
+
+        workspace = get_workspace(self.maze.height, width)
+        generation = workspace.begin()
+        seen, parent, cost, heap = (
+            workspace.seen,
+            workspace.parent,
+            workspace.cost,
+            workspace.heap,
+        )
+
+        seen[start] = generation
+        parent[start] = -1
+        cost[start] = 0
+        heappush(heap, (0, 0, start))
+
+        while heap:
+            _, negative_cost, index = heappop(heap)
+            if index == target:
+                # map every cell on the path to the one after it
+                steps = {}
+                while parent[index] != -1:
+                    steps[parent[index]] = index
+                    index = parent[index]
+                return steps
+
+            step = -negative_cost
+            if step > cost[index]:
+                continue
+            step += 1
+
+            x = index % width
+            neighbours = []
+            if index >= width:
+                neighbours.append(index - width)
+            if index + width < size:
+                neighbours.append(index + width)
+            if x > 0:
+                neighbours.append(index - 1)
+            if x < width - 1:
+                neighbours.append(index + 1)
+
+            for other in neighbours:
+                if cells[other] == WALL:
+                    continue
+                if seen[other] != generation or step < cost[other]:
+                    seen[other] = generation
+                    parent[other] = index
+                    cost[other] = step
+                    estimate = step + self.heuristic(other, target)
+                    heappush(heap, (estimate, -step, other))
+
+        return None
+
+    def next_step(self, start: tuple[int, int], target: tuple[int, int]):
+        maze = self.maze
+        if not (maze.in_bounds(*start) and maze.in_bounds(*target)):
+            return None
+
+        index = start[1] * maze.width + start[0]
+        goal = target[1] * maze.width + target[0]
+        if index == goal or WALL in (maze.cells[index], maze.cells[goal]):
+            return None
+
+        # paths towards recent targets are kept, so followers only look up
+        steps = self.paths.get(goal)
+        if steps is None or index not in steps:
+            steps = self.search(index, goal)
+            if steps is None:
+                return None
+
+            self.paths[goal] = steps
+            while len(self.paths) > 8:
+                self.paths.popitem(last=False)
+
+        self.paths.move_to_end(goal)
+        hop = steps[index]
+        return hop % maze.width, hop // maze.width
+
+    def payload(self) -> bytes:
+        return b"".join(distance.tobytes() for distance in self.distances)
+
+
+def maze_key(maze: Grid) -> str:
+    digest = hashlib.sha1(struct.pack("<HH", maze.width, maze.height))
+    digest.update(maze.wall_bytes())  # coins and tunnels don't change paths
+    return digest.hexdigest()
+
+
+def build(maze: Grid, full_limit: int, landmarks: int):
+    open_count = sum(1 for cell in maze.cells if cell != WALL)
+
+    if open_count <= full_limit:
+        table = FullTable(maze)
+        table.build()
+    else:
+        table = LandmarkTable(maze)
+        table.build(landmarks)
+
+    return table
+
+
+def save(table, path: str) -> None:
+    maze = table.maze
+    count = len(table.distances) if table.kind == LANDMARKS else 0
+    header = HEADER.pack(MAGIC, VERSION, table.kind, maze.width, maze.height, count)
+
+    # written beside the final path and moved into place, so processes
+    # sharing the cache never see half a file
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    descriptor, temporary = tempfile.mkstemp(".tmp", dir=directory)
+    try:
+        with os.fdopen(descriptor, "wb") as file:
+            file.write(header)
+            file.write(table.payload())
+        os.replace(temporary, path)
+    except BaseException:
+        os.remove(temporary)
+        raise
+
+
+def load(maze: Grid, path: str, kind: int = None, count: int = None):
+    # kind and count, when given, are what the file has to hold. Anything
+    # that doesn't match, including a cut off payload, raises ValueError
+    with open(path, "rb") as file:
+        data = file.read()
+
+    if len(data) < HEADER.size:
+        raise ValueError(f"Oracle file {path} is truncated")
+
+    magic, version, file_kind, width, height, file_count = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"Not an oracle file: {path}")
+    if (width, height) != (maze.width, maze.height):
+        raise ValueError(f"Oracle {path} was built for another maze size")
+    if kind is not None and file_kind != kind:
+        raise ValueError(f"Oracle {path} holds another kind of table")
+    if kind == LANDMARKS and count is not None and file_count != count:
+        raise ValueError(f"Oracle {path} has {file_count} landmarks, not {count}")
+
+    payload = data[HEADER.size :]
+    if file_kind == FULL:
+        open_count = sum(1 for cell in maze.cells if cell != WALL)
+        expected = open_count**2
+    else:
+        expected = file_count * len(maze.cells) * 4
+    if len(payload) != expected:
+        raise ValueError(
+            f"Oracle {path} has {len(payload)} bytes of table, not {expected}"
+        )
+
+    if file_kind == FULL:
+        return FullTable(maze, bytearray(payload))
+
+    size = len(maze.cells) * 4
+    distances = []
+    for n in range(file_count):
+        distance = array("i")
+        distance.frombytes(payload[n * size : (n + 1) * size])
+        distances.append(distance)
+
+    return LandmarkTable(maze, distances)
+
+
+def evict(cache_dir: str, max_files: int) -> None:
+    # least recently used files first, loading a file touches it. Other
+    # processes may share the cache and remove files under us
+    files = []
+    for name in os.listdir(cache_dir):
+        if not name.endswith(".oracle"):
+            continue
+        path = os.path.join(cache_dir, name)
+        try:
+            files.append((os.path.getmtime(path), path))
+        except FileNotFoundError:
+            pass
+    files.sort()
+
+    for _, path in files[: max(0, len(files) - max_files)]:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def load_or_build(
+    maze: Grid, cache_dir: str, full_limit: int, landmarks: int, max_files: int
+):
+    # the file name is a digest of the maze, so the same level reuses it. A
+    # file that is stale or broken is rebuilt, and at most max_files are kept
+    path = os.path.join(cache_dir, f"{maze_key(maze)}.oracle")
+    open_count = sum(1 for cell in maze.cells if cell != WALL)
+    kind = FULL if open_count <= full_limit else LANDMARKS
+
+    try:
+        table = load(maze, path, kind, landmarks)
+    except (FileNotFoundError, ValueError):
+        pass
+    else:
+        try:
+            os.utime(path)
+        except FileNotFoundError:  # evicted by another process meanwhile
+            pass
+        return table
+
+    table = build(maze, full_limit, landmarks)
+    save(table, path)
+    evict(cache_dir, max_files)
+    return table
@@ -1,4 +1,7 @@
 from collections import deque
+from heapq import heappop, heappush
+
+from grid import WALL, Grid
 
 
 def is_valid(grid, visited, row, col):
@@ -61,3 +64,345 @@ def bfs(grid, start, end):
 
     return []  # Path not found
 
+
+class Workspace:
+    """Flat search buffers that are reused by every query on one grid size."""
+
+    def __init__(self, rows: int, cols: int) -> None:
+        size = rows * cols
+        self.rows = rows
+        self.cols = cols
+        self.generation = 0
+        self.seen = [0] * size  # generation stamp of the last visit
+        self.parent = [-1] * size
+        self.cost = [0] * size
+        self.heap: list[tuple[int, int, int]] = []
+
+    def begin(self) -> int:
+        # bumping the generation invalidates every stamp without clearing
+        self.generation += 1
+        self.heap.clear()
+        return self.generation
+
+    def path(self, index: int) -> list[tuple[int, int]]:
+        path = []
+        while index != -1:
+            path.append(divmod(index, self.cols))
+            index = self.parent[index]
+        return path[::-1]
+
+
+_workspaces: dict[tuple[int, int], Workspace] = {}
+
+
+def get_workspace(rows: int, cols: int) -> Workspace:
+    workspace = _workspaces.get((rows, cols))
+    if workspace is None:
+        workspace = _workspaces[(rows, cols)] = Workspace(rows, cols)
+    return workspace
+
+
+def _passable(maze: Grid, row: int, col: int) -> bool:
+    return maze.in_bounds(col, row) and maze.cells[row * maze.width + col] != WALL
+
+
+def astar(maze: Grid, start, end):
+    # start and end are in format (y, x) or (row, col), same as bfs, but the
+    # maze is searched as flat cells indexed by y * width + x
+    if not (_passable(maze, *start) and _passable(maze, *end)):
+        return []
+
+    width, height = maze.width, maze.height
+    cells = maze.cells
+    workspace = get_workspace(height, width)
+    generation = workspace.begin()
+    seen, parent, cost = workspace.seen, workspace.parent, workspace.cost
+
+    end_row, end_col = end
+    goal = end_row * width + end_col
+    index = start[0] * width + start[1]
+
+    # With the Manhattan heuristic a step changes f = cost + estimate by 0 or
+    # 2, so the open cells only ever sit in two buckets, f and f + 2. Each
+    # is a stack, which makes ties go to the deeper cell. Cells are stamped
+    # with the generation when found and its negative once expanded
+    seen[index] = generation
+    parent[index] = -1
+    cost[index] = 0
+    current, following = [index], []
+
+    while current or following:
+        if not current:
+            current, following = following, current
+
+        index = current.pop()
+        if seen[index] != generation:  # already expanded on a shorter path
+            continue
+        if index == goal:
+            return workspace.path(index)
+
+        seen[index] = -generation
+        step = cost[index] + 1
+        row, col = divmod(index, width)
+
+        if row:
+            other = index - width
+            if cells[other] != WALL and seen[other] != -generation:
+                if seen[other] != generation or step < cost[other]:
+                    seen[other] = generation
+                    parent[other] = index
+                    cost[other] = step
+                    (current if end_row < row else following).append(other)
+        if row + 1 < height:
+            other = index + width
+            if cells[other] != WALL and seen[other] != -generation:
+                if seen[other] != generation or step < cost[other]:
+                    seen[other] = generation
+                    parent[other] = index
+                    cost[other] = step
+                    (current if end_row > row else following).append(other)
+        if col:
+            other = index - 1
+            if cells[other] != WALL and seen[other] != -generation:
+                if seen[other] != generation or step < cost[other]:
+                    seen[other] = generation
+                    parent[other] = index
+                    cost[other] = step
+                    (current if end_col < col else following).append(other)
+        if col + 1 < width:
+            other = index + 1
+            if cells[other] != WALL and seen[other] != -generation:
+                if seen[other] != generation or step < cost[other]:
+                    seen[other] = generation
+                    parent[other] = index
+                    cost[other] = step
+                    (current if end_col > col else following).append(other)
+
+    return []  # Path not found
+
+
+def _jump(cells, width: int, index: int, step: int, end: int) -> int:
+    # Walk from index by step until a jump point and return its index, or -1.
+    # Steps of 1 are horizontal, steps of width vertical
+    size = len(cells)
+    col = index % width
+
+    if step in (1, -1):
+        # horizontal: stop where a side opens up behind us
+        while True:
+            col += step
+            if not 0 <= col < width:
+                return -1
+            index += step
+            if cells[index] == WALL:
+                return -1
+            if index == end:
+                return index
+
+            for side in (-width, width):
+                beside = index + side
+                if (
+                    0 <= beside < size
+                    and cells[beside] != WALL
+                    and cells[beside - step] == WALL
+                ):
+                    return index
+
+    # vertical: same, and also stop if a horizontal jump succeeds
+    while True:
+        index += step
+        if not 0 <= index < size or cells[index] == WALL:
+            return -1
+        if index == end:
+            return index
+
+        for side in (-1, 1):
+            if not 0 <= col + side < width:
+                continue
+            if cells[index + side] != WALL and cells[index + side - step] == WALL:
+                return index
+
+        for side in (-1, 1):
+            if _jump(cells, width, index, side, end) != -1:
+                return index
+
+
+def jps(maze: Grid, start, end):
+    # Jump Point Search for 4-connected uniform grids, same output as bfs
+    if not (_passable(maze, *start) and _passable(maze, *end)):
+        return []
+
+    width, cells = maze.width, maze.cells
+    workspace = get_workspace(maze.height, width)
+    generation = workspace.begin()
+    seen, parent, cost, heap = (
+        workspace.seen,
+        workspace.parent,
+        workspace.cost,
+        workspace.heap,
+    )
+
+    end_row, end_col = end
+    goal = end_row * width + end_col
+    index = start[0] * width + start[1]
+
+    seen[index] = generation
+    parent[index] = -1
+    cost[index] = 0
+    heappush(heap, (0, 0, index))
+
+    while heap:
+        _, negative_cost, index = heappop(heap)
+        if index == goal:
+            return _expand(workspace.path(index))
+
+        step = -negative_cost
+        if step > cost[index]:  # stale heap entry
+            continue
+
+        row, col = divmod(index, width)
+
+        # Prune the directions using the way we came into this node
+        came_from = parent[index]
+        if came_from == -1:
+            directions = (-width, width, -1, 1)
+        elif abs(index - came_from) < width:
+            forward = 1 if index > came_from else -1
+            directions = (-width, width, forward)
+        else:
+            forward = width if index > came_from else -width
+            directions = (-1, 1, forward)
+
+        for direction in directions:
+            other = _jump(cells, width, index, direction, goal)
+            if other == -1:
+                continue
+
+            r, c = divmod(other, width)
+            new_cost = step + abs(r - row) + abs(c - col)
+            if seen[other] != generation or new_cost < cost[other]:
+                seen[other] = generation
+                parent[other] = index
+                cost[other] = new_cost
+                estimate = new_cost + abs(r - end_row) + abs(c - end_col)
+                heappush(heap, (estimate, -new_cost, other))
+
+    return []  # Path not found
+
+
+def _expand(jump_points):
+    # Fill in the straight runs between consecutive jump points
+    path = jump_points[:1]
+    for (row, col), (next_row, next_col) in zip(jump_points, jump_points[1:]):
+        d_row = (next_row > row) - (next_row < row)
+        d_col = (next_col > col) - (next_col < col)
+        while (row, col) != (next_row, next_col):
+            row += d_row
+            col += d_col
+            path.append((row, col))
+
+    return path
+
+
+class FlowField:
+    """Distance and next hop towards one target tile for every cell."""
+
+    def __init__(self, maze: Grid) -> None:
+        self.maze = maze
+        self.target = None
+        self.distance: list[int] = []
+        self.next_hop: list[int] = []
+        self.search = None  # target, distance, next_hop and queue of a BFS
+        self.open_cells = len(maze.cells) - maze.cells.count(WALL)
+
+    def update(self, target: tuple[int, int]) -> bool:
+        # only recompute when the target moved to another tile
+        if target == self.target:
+            return False
+
+        self.start(target)
+        self.expand()
+        return True
+
+    def advance(self, target: tuple[int, int], limit: int) -> bool:
+        # update() spread over calls, visiting at most limit cells per call.
+        # Lookups use the last finished field meanwhile, and a started search
+        # is finished before the next target is taken. True once swapped in
+        if self.search is None:
+            if target == self.target:
+                return False
+            self.start(target)
+
+        return self.expand(limit)
+
+    def budget(self, cells: int, ticks: int) -> int:
+        # cells per advance() for a search to reach every open cell within
+        # ticks calls, but at least cells
+        return max(cells, -(-self.open_cells // ticks))
+
+    def start(self, target: tuple[int, int]) -> None:
+        size = self.maze.width * self.maze.height
+        distance = [-1] * size
+        next_hop = [-1] * size
+        queue = deque()
+
+        if self.maze.in_bounds(*target):
+            start = target[1] * self.maze.width + target[0]
+            distance[start] = 0
+            queue.append(start)
+
+        self.search = target, distance, next_hop, queue
+
+    def expand(self, limit: int = None) -> bool:
+        target, distance, next_hop, queue = self.search
+        width = self.maze.width
+        cells = self.maze.cells
+        size = len(cells)
+
+        # BFS outwards from the target, every cell points back the way we came
+        visited = 0
+        while queue and (limit is None or visited < limit):
+            visited += 1
+            index = queue.popleft()
+            step = distance[index] + 1
+            x = index % width
+
+            neighbours = []
+            if index >= width:
+                neighbours.append(index - width)
+            if index + width < size:
+                neighbours.append(index + width)
+            if x > 0:
+                neighbours.append(index - 1)
+            if x < width - 1:
+                neighbours.append(index + 1)
+
+            for other in neighbours:
+                if distance[other] == -1 and cells[other] != WALL:
+                    distance[other] = step
+                    next_hop[other] = index
+                    queue.append(other)
+
+        if queue:
+            return False
+
+        self.target, self.distance, self.next_hop = target, distance, next_hop
+        self.search = None
+        return True
+
+    def distance_to(self, x: int, y: int) -> int:
+        # -1 when the target can't be reached from (x, y)
+        if self.target is None or not self.maze.in_bounds(x, y):
+            return -1
+
+        return self.distance[y * self.maze.width + x]
+
+    def next_step(self, x: int, y: int) -> tuple[int, int] | None:
+        if self.target is None or not self.maze.in_bounds(x, y):
+            return None
+
+        hop = self.next_hop[y * self.maze.width + x]
+        if hop == -1:  # No path or already at the target
+            return None
+
+        return hop % self.maze.width, hop // self.maze.width
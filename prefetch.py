@@ -0,0 +1,80 @@
+import multiprocessing
+import random
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+
+import settings as st
+from level import Level, LevelParams
+from simulation import Simulation
+
+
+def plan_level(seed: int, params: LevelParams) -> dict:
+    # runs in the worker process, tile sets are only loaded for their sizes
+    level = Level.__new__(Level)
+    level.load_tiles()
+    level.plan(seed, params)
+    return {name: getattr(level, name) for name in Level.PLANNED}
+
+
+class LevelPrefetcher:
+    """Generates upcoming levels in the background while one is played.
+
+    Level.plan, the maze, placements and tile variants, runs in a worker
+    process, so it never holds the game's GIL. A worker thread waits for
+    it and runs Level.prepare, the tiles and rects. take() only waits if
+    that isn't done yet and composites the few tunnel, entrance and exit
+    tiles, so starting a level costs the same however big its maze is.
+    """
+
+    def __init__(self) -> None:
+        # workers are only started by the first submit, spawned like batch.py
+        # does so they never inherit the window
+        context = multiprocessing.get_context("spawn")
+        self.processes = ProcessPoolExecutor(1, mp_context=context)
+        self.executor = ThreadPoolExecutor(1, thread_name_prefix="prefetch")
+        # params -> simulation seed, level, plan and prepare futures
+        self.pending: dict[LevelParams, tuple[int, Level, Future, Future]] = {}
+
+    def prefetch(self, params: LevelParams) -> None:
+        if st.ENDLESS or params in self.pending:
+            return
+
+        # the simulation seed is picked now and the level gets the seed the
+        # simulation derives from it, so replays still rebuild the same level
+        seed = random.getrandbits(64)
+        level_seed = random.Random(seed).getrandbits(64)
+
+        # tiles come from the asset cache, which is filled on the main thread
+        level = Level.__new__(Level)
+        level.load_tiles()
+
+        planned = self.processes.submit(plan_level, level_seed, params)
+        future = self.executor.submit(self.prepare, level, planned)
+        self.pending[params] = seed, level, planned, future
+
+    def prepare(self, level: Level, planned: Future) -> None:
+        # waiting on the process releases the GIL, prepare() takes it again
+        level.__dict__.update(planned.result())
+        level.prepare()
+
+    def take(self) -> Simulation:
+        # a simulation on the prefetched level for the current settings, or
+        # on a level built right now if there is none
+        pending = self.pending.pop(LevelParams.current(), None)
+
+        # the other levels were for an outcome that didn't happen, a plan
+        # that already started still runs but nothing waits for it
+        for _, _, planned, future in self.pending.values():
+            planned.cancel()
+            future.cancel()
+        self.pending.clear()
+
+        if pending is None:
+            return Simulation()
+
+        seed, level, _, future = pending
+        future.result()
+        level.compose()
+        return Simulation(level, seed)
+
+
+prefetcher = LevelPrefetcher()
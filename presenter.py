@@ -0,0 +1,87 @@
+from math import gcd
+
+import pygame
+
+
+class Presenter:
+    """Scales the game surface onto the window, only where something changed.
+
+    The window is scaled into in place, and after the first frame only the
+    areas entities or coins touched are rescaled and pushed to the display.
+    """
+
+    def __init__(self, screen: pygame.Surface, surface: pygame.Surface) -> None:
+        self.screen = screen
+        self.surface = surface
+
+        # source areas snap to this grid so they scale to whole window pixels
+        width, height = surface.get_size()
+        window_width, window_height = screen.get_size()
+        self.step_x = width // gcd(width, window_width)
+        self.step_y = height // gcd(height, window_height)
+
+        self.full = True
+        self.drawn: list[pygame.Rect] = []  # entity rects of the last frame
+        self.current: list[pygame.Rect] = []
+        self.updated: list[pygame.Rect] = []
+
+    def invalidate(self) -> None:
+        # redraw and present the whole frame next time
+        self.full = True
+
+    def areas(self) -> list[pygame.Rect] | None:
+        # areas of the game surface to redraw this frame, None for all of it
+        return None if self.full else self.drawn
+
+    def add(self, rect: pygame.Rect) -> None:
+        self.current.append(rect)
+
+    def snap(self, rect: pygame.Rect) -> pygame.Rect:
+        left = rect.left // self.step_x * self.step_x
+        top = rect.top // self.step_y * self.step_y
+        right = -(-rect.right // self.step_x) * self.step_x
+        bottom = -(-rect.bottom // self.step_y) * self.step_y
+
+        snapped = pygame.Rect(left, top, right - left, bottom - top)
+        return snapped.clip(self.surface.get_rect())
+
+    def present(self, cleared: list[pygame.Rect]) -> None:
+        # cleared are the extra areas Level.draw repainted, like picked up coins
+        screen, surface = self.screen, self.surface
+        self.updated.clear()
+
+        if self.full:
+            pygame.transform.scale(surface, screen.get_size(), screen)
+            self.updated.append(screen.get_rect())
+        else:
+            # an entity's old and new rect usually overlap, so join them
+            dirty = list(cleared)
+            if len(self.drawn) == len(self.current):
+                dirty += [a.union(b) for a, b in zip(self.drawn, self.current)]
+            else:
+                dirty += self.drawn + self.current
+
+            scale_x = screen.get_width() / surface.get_width()
+            scale_y = screen.get_height() / surface.get_height()
+            for rect in dirty:
+                area = self.snap(rect)
+                if not area:
+                    continue
+
+                target = pygame.Rect(
+                    round(area.x * scale_x),
+                    round(area.y * scale_y),
+                    round(area.width * scale_x),
+                    round(area.height * scale_y),
+                )
+                pygame.transform.scale(
+                    surface.subsurface(area), target.size, screen.subsurface(target)
+                )
+                self.updated.append(target)
+
+        self.full = False
+        self.drawn, self.current = self.current, self.drawn
+        self.current.clear()
+
+    def flip(self) -> None:
+        pygame.display.update(self.updated)
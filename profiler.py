@@ -0,0 +1,195 @@
+import json
+import os
+import time
+from array import array
+
+import pygame
+import settings as st
+
+BUDGET_MS = 1000 / 60
+
+BACKGROUND = (0, 0, 0, 180)
+TEXT = (255, 255, 255)
+BAR = (80, 200, 120)
+OVER_BUDGET = (230, 70, 70)
+BUDGET_LINE = (240, 200, 60)
+
+
+class Phase:
+    """Reusable context manager that times one named phase of a frame."""
+
+    def __init__(self, profiler: "Profiler", name: str) -> None:
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self) -> None:
+        profiler = self.profiler
+        if profiler.spans is not None:
+            profiler.stack.append(time.perf_counter_ns())
+
+    def __exit__(self, *exc) -> None:
+        profiler = self.profiler
+        if profiler.spans is not None and profiler.stack:
+            start = profiler.stack.pop()
+            duration = time.perf_counter_ns() - start
+            profiler.spans.append((self.name, start, duration, len(profiler.stack)))
+
+
+class Profiler:
+    """Phase timings for the last few hundred frames, kept in a ring buffer."""
+
+    def __init__(self, frames: int = 300) -> None:
+        self.capacity = frames
+        self.enabled = False
+
+        # slot n holds frame number count - capacity + n, spans are
+        # (phase, start ns, duration ns, depth)
+        self.frames: list[list[tuple]] = [[] for _ in range(frames)]
+        self.frame_start = array("q", [0]) * frames
+        self.frame_time = array("q", [0]) * frames
+        self.count = 0
+
+        self.spans = None  # spans of the frame being recorded
+        self.stack: list[int] = []
+        self.phases: dict[str, Phase] = {}
+        self.font = None
+
+    def phase(self, name: str) -> Phase:
+        if name not in self.phases:
+            self.phases[name] = Phase(self, name)
+        return self.phases[name]
+
+    def begin_frame(self) -> None:
+        if not self.enabled:
+            self.spans = None
+            return
+
+        slot = self.count % self.capacity
+        self.spans = self.frames[slot]
+        self.spans.clear()
+        self.stack.clear()
+        self.frame_start[slot] = time.perf_counter_ns()
+
+    def end_frame(self) -> None:
+        if self.spans is None:
+            return
+
+        slot = self.count % self.capacity
+        self.frame_time[slot] = time.perf_counter_ns() - self.frame_start[slot]
+        self.count += 1
+        self.spans = None
+
+    def recorded(self) -> range:
+        # numbers of the frames still in the buffer, oldest first
+        first = max(0, self.count - self.capacity)
+        return range(first, self.count)
+
+    def phase_totals(self) -> dict[str, list[float]]:
+        # milliseconds spent in each phase, one entry per recorded frame
+        totals: dict[str, list[float]] = {}
+        frames = self.recorded()
+
+        for position, frame in enumerate(frames):
+            for name, _, duration, _ in self.frames[frame % self.capacity]:
+                times = totals.setdefault(name, [0.0] * len(frames))
+                times[position] += duration / 1e6
+
+        return totals
+
+    def percentiles(self, points=(50, 95, 99)) -> dict[str, tuple[float, ...]]:
+        found = {}
+        for name, times in self.phase_totals().items():
+            times.sort()
+            last = len(times) - 1
+            found[name] = tuple(times[round(last * point / 100)] for point in points)
+        return found
+
+    def draw(self, surface: pygame.Surface) -> None:
+        # percentile bars per phase and a frame-time graph, scaled to the budget
+        if self.font is None:
+            self.font = pygame.font.Font(None, 18)
+
+        stats = sorted(self.percentiles().items(), key=lambda item: -item[1][1])
+        width, line = 420, 16
+        height = 30 + line * len(stats) + 70
+        panel = pygame.Surface((width, height), pygame.SRCALPHA)
+        panel.fill(BACKGROUND)
+
+        # the bars are as wide as the frame budget at their longest
+        scale = 190 / BUDGET_MS
+        columns = 6, 100, 140, 180
+        for x, title in zip(columns, ("phase", "p50", "p95", "p99 ms")):
+            panel.blit(self.font.render(title, True, TEXT), (x, 6))
+
+        for row, (name, times) in enumerate(stats):
+            y = 26 + row * line
+            labels = name, *(f"{time_ms:.2f}" for time_ms in times)
+            for x, label in zip(columns, labels):
+                panel.blit(self.font.render(label, True, TEXT), (x, y))
+
+            p50, p95, p99 = (min(time_ms * scale, 190) for time_ms in times)
+            colour = OVER_BUDGET if times[2] > BUDGET_MS else BAR
+            pygame.draw.rect(panel, colour, (224, y + 2, p99, 3))
+            pygame.draw.rect(panel, colour, (224, y + 6, p95, 3))
+            pygame.draw.rect(panel, TEXT, (224, y + 10, p50, 2))
+
+        # one column per recorded frame, newest on the right
+        bottom = height - 6
+        graph_scale = 50 / (BUDGET_MS * 2)
+        frames = self.recorded()
+        for column, frame in enumerate(frames[-(width - 12) :]):
+            frame_ms = self.frame_time[frame % self.capacity] / 1e6
+            bar = min(frame_ms * graph_scale, 60)
+            colour = OVER_BUDGET if frame_ms > BUDGET_MS else BAR
+            x = 6 + column
+            pygame.draw.line(panel, colour, (x, bottom), (x, bottom - bar))
+
+        budget_y = bottom - BUDGET_MS * graph_scale
+        pygame.draw.line(panel, BUDGET_LINE, (6, budget_y), (width - 6, budget_y))
+
+        surface.blit(panel, (8, 8))
+
+    def export(self, path: str) -> None:
+        # Chrome trace-event JSON, open it in chrome://tracing or Perfetto
+        frames = self.recorded()
+        if not frames:
+            return
+
+        origin = self.frame_start[frames[0] % self.capacity]
+        events = []
+        for frame in frames:
+            slot = frame % self.capacity
+            start = self.frame_start[slot]
+            frame_ms = self.frame_time[slot] / 1e6
+            events.append(
+                {
+                    "name": "frame",
+                    "ph": "X",
+                    "pid": 0,
+                    "tid": 0,
+                    "ts": (start - origin) / 1000,
+                    "dur": self.frame_time[slot] / 1000,
+                    "args": {"frame": frame, "over_budget": frame_ms > BUDGET_MS},
+                }
+            )
+            for name, span_start, duration, depth in self.frames[slot]:
+                events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "pid": 0,
+                        "tid": 0,
+                        "ts": (span_start - origin) / 1000,
+                        "dur": duration / 1000,
+                        "args": {"frame": frame, "depth": depth},
+                    }
+                )
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
+
+
+# shared by the game loop, the simulation and the entities
+profiler = Profiler(st.PROFILE_FRAMES)
+profiler.enabled = st.PROFILE
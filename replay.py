@@ -0,0 +1,211 @@
+import argparse
+import cProfile
+import json
+import os
+import pstats
+import struct
+import time
+
+if __name__ == "__main__":
+    # replays from the command line never open a window
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+import settings as st
+from simulation import Simulation
+from world import new_level
+
+MAGIC = b"MMRP"
+VERSION = 1
+HEADER = struct.Struct("<4sBQQdI")  # magic, version, seed, level seed, dt, json size
+
+# settings that change how a run plays out
+SNAPSHOT = (
+    "TILE_SIZE",
+    "SIZE_X",
+    "SIZE_Y",
+    "MAZE_ALGORITHM",
+    "ENDLESS",
+    "CHUNK_SIZE",
+    "CHUNK_DOORS",
+    "CHUNK_TUNNELS",
+    "CHUNK_COINS",
+    "HELP_AMOUNT",
+    "COIN_AMOUNT",
+    "BAT_AMOUNT",
+    "ORACLE",
+    "ORACLE_FULL_LIMIT",
+    "ORACLE_LANDMARKS",
+    "AI_REPLANS",
+    "AI_PATH_LENGTH",
+    "AI_FIELD_CELLS",
+    "AI_FIELD_TICKS",
+    "SWARM",
+)
+
+KEYDOWN, KEYUP = 0, 1
+
+
+def write_varint(file, value: int) -> None:
+    while value >= 0x80:
+        file.write(bytes(((value & 0x7F) | 0x80,)))
+        value >>= 7
+    file.write(bytes((value,)))
+
+
+def read_varint(data: bytes, offset: int) -> tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = data[offset]
+        offset += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, offset
+        shift += 7
+
+
+class Recorder:
+    """Writes the seed, settings and every tick's key events of a run.
+
+    Each record is the tick delta, the number of events and then one
+    type byte and key per event, all as varints. A final record with no
+    events marks the tick the run ended on.
+    """
+
+    def __init__(self, path: str, simulation: Simulation) -> None:
+        snapshot = {name: getattr(st, name) for name in SNAPSHOT}
+        settings = json.dumps(snapshot).encode()
+
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.file = open(path, "wb")
+        self.file.write(
+            HEADER.pack(
+                MAGIC,
+                VERSION,
+                simulation.seed,
+                simulation.level.seed,
+                st.FIXED_DT,
+                len(settings),
+            )
+        )
+        self.file.write(settings)
+
+        self.last_tick = 0
+        self.simulation = simulation
+
+    def record(self, tick: int, inputs) -> None:
+        write_varint(self.file, tick - self.last_tick)
+        write_varint(self.file, len(inputs))
+        for event_type, key in inputs:
+            code = KEYDOWN if event_type == pygame.KEYDOWN else KEYUP
+            self.file.write(bytes((code,)))
+            write_varint(self.file, key)
+        self.last_tick = tick
+
+    def close(self) -> None:
+        if self.file.closed:
+            return
+
+        self.record(self.simulation.ticks, ())
+        self.file.close()
+        self.simulation.recorder = None
+
+
+class Replay:
+    def __init__(self, path: str) -> None:
+        with open(path, "rb") as file:
+            data = file.read()
+
+        magic, version, seed, level_seed, dt, size = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"Not a replay file: {path}")
+
+        self.seed = seed
+        self.level_seed = level_seed
+        self.dt = dt
+        offset = HEADER.size
+        self.settings = json.loads(data[offset : offset + size])
+        offset += size
+
+        # a replay that misses a setting would play it out with today's value
+        missing = [name for name in SNAPSHOT if name not in self.settings]
+        if missing:
+            raise ValueError(f"Replay {path} doesn't record {', '.join(missing)}")
+
+        # tick -> [(pygame event type, key)], and the tick the run ended on
+        self.inputs: dict[int, list[tuple[int, int]]] = {}
+        self.ticks = tick = 0
+        while offset < len(data):
+            delta, offset = read_varint(data, offset)
+            count, offset = read_varint(data, offset)
+            tick += delta
+
+            events = []
+            for _ in range(count):
+                event_type = pygame.KEYDOWN if data[offset] == KEYDOWN else pygame.KEYUP
+                key, offset = read_varint(data, offset + 1)
+                events.append((event_type, key))
+
+            if events:
+                self.inputs.setdefault(tick, []).extend(events)
+            self.ticks = tick
+
+    def differences(self) -> dict[str, tuple]:
+        # recorded settings that differ from the current ones, name -> both
+        return {
+            name: (value, getattr(st, name))
+            for name, value in self.settings.items()
+            if getattr(st, name) != value
+        }
+
+    def simulation(self) -> Simulation:
+        for name, value in self.settings.items():
+            setattr(st, name, value)
+
+        return Simulation(new_level(self.level_seed), self.seed)
+
+    def play(self, simulation: Simulation = None):
+        # re-simulates as fast as possible, returns the run and each tick's time
+        simulation = simulation or self.simulation()
+        timings = []
+
+        for tick in range(self.ticks):
+            started = time.perf_counter()
+            simulation.step(self.dt, self.inputs.get(tick, ()))
+            timings.append(time.perf_counter() - started)
+
+        return simulation, timings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-simulate a recorded run.")
+    parser.add_argument("path")
+    parser.add_argument("--profile", action="store_true", help="run under cProfile")
+    parser.add_argument("--slowest", type=int, default=5, help="slow ticks to list")
+    args = parser.parse_args(argv)
+
+    replay = Replay(args.path)
+    for name, (recorded, current) in replay.differences().items():
+        print(f"{name} is {current} in settings, replaying with {recorded}")
+    simulation = replay.simulation()
+
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    simulation, timings = replay.play(simulation)
+    if profiler:
+        profiler.disable()
+
+    print(f"seed {replay.seed}, {replay.ticks} ticks, outcome {simulation.outcome}")
+    print(f"total {sum(timings) * 1000:.1f} ms")
+    slowest = sorted(range(len(timings)), key=timings.__getitem__, reverse=True)
+    for tick in slowest[: args.slowest]:
+        print(f"tick {tick}: {timings[tick] * 1000:.3f} ms")
+
+    if profiler:
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(25)
+
+
+if __name__ == "__main__":
+    main()
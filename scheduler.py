@@ -0,0 +1,50 @@
+import settings as st
+from profiler import profiler
+
+PATHFINDING = profiler.phase("pathfinding")
+
+
+class PathScheduler:
+    """Queue of bats waiting to replan, served a few per tick.
+
+    The budgets are counted in replans and flow field cells rather than
+    milliseconds, so a seeded run plays out the same on every machine. The
+    cell budget grows with the maze, so every rebuild of the flow field
+    is done within field_ticks ticks.
+    Nearer bats go first and every tick spent waiting counts as one tile
+    nearer, so far bats aren't starved.
+    """
+
+    def __init__(self, replans: int, cells: int, field_ticks: int) -> None:
+        self.replans = replans
+        self.cells = cells
+        self.field_ticks = field_ticks
+        self.waiting: dict = {}  # bat -> tick of its request, oldest first
+        self.ticks = 0
+
+    def request(self, bat) -> None:
+        self.waiting.setdefault(bat, self.ticks)
+
+    def priority(self, bat, since: int) -> int:
+        player = bat.player.rect
+        distance = abs(bat.rect.x - player.x) + abs(bat.rect.y - player.y)
+        return distance // st.TILE_SIZE - (self.ticks - since)
+
+    def run(self, level, player) -> None:
+        with PATHFINDING:
+            # bats follow the last finished field while this one is built
+            if level.oracle is None:
+                target = level.tile_pos(player.rect.topleft)
+                field = level.flow_field
+                field.advance(target, field.budget(self.cells, self.field_ticks))
+
+            # sorted() is stable, so equal priorities keep the order of requests
+            waiting = sorted(
+                self.waiting.items(), key=lambda item: self.priority(*item)
+            )
+            for bat, _ in waiting[: self.replans]:
+                del self.waiting[bat]
+                if bat.seeking_player:
+                    bat.replan()
+
+        self.ticks += 1
@@ -12,9 +12,69 @@ TILE_SIZE = 16
 SIZE_X = 32
 SIZE_Y = 24
 
-SURFACE_WIDTH, SURFACE_HEIGHT = SIZE_X * TILE_SIZE, SIZE_Y * TILE_SIZE
+# tiles shown at once, the camera scrolls over mazes bigger than this
+VIEW_X = 32
+VIEW_Y = 24
+
+SURFACE_WIDTH, SURFACE_HEIGHT = VIEW_X * TILE_SIZE, VIEW_Y * TILE_SIZE
 SURFACE_SIZE = SURFACE_WIDTH, SURFACE_HEIGHT
 
+# static tiles are baked into surfaces of BAKE_REGION tiles a side, a maze
+# that fits is baked whole. At most BAKE_CACHE of them are kept
+BAKE_REGION = 64
+BAKE_CACHE = 16
+
+# backtracker (long corridors), kruskal (short dead ends), eller (fastest)
+MAZE_ALGORITHM = "backtracker"
+
+# precomputed next-hop oracle for bats, cached per maze in ORACLE_CACHE_DIR
+ORACLE = False
+ORACLE_CACHE_DIR = "oracle_cache"
+ORACLE_CACHE_FILES = 64  # least recently used files are deleted above this
+ORACLE_FULL_LIMIT = 4096  # open cells, above this landmarks (ALT) are used
+ORACLE_LANDMARKS = 8
+
+# bats replan through a scheduler, at most AI_REPLANS of them per tick, and
+# follow the next AI_PATH_LENGTH tiles of their last plan until their turn.
+# The flow field towards the player is rebuilt AI_FIELD_CELLS cells per tick,
+# or more on big mazes so that a rebuild never takes over AI_FIELD_TICKS ticks.
+# A rebuild runs to the end before it takes the player's new tile, so seeking
+# bats head for where the player was up to 2 * AI_FIELD_TICKS ticks ago, one
+# second or about three tiles by default. Fewer ticks keep them closer on the
+# player's heels but cost more cells per tick, ~17000 on a 1024x1024 maze
+AI_REPLANS = 4
+AI_PATH_LENGTH = 4
+AI_FIELD_CELLS = 1024
+AI_FIELD_TICKS = 30
+
+# bats as one numpy BatSwarm instead of Bat objects, for hordes of them. Needs
+# a fixed maze, so it can't be combined with ENDLESS
+SWARM = False
+
+# cell size of the spatial hash entities are looked up in, in pixels
+ENTITY_CELL = 32
+
+# simulation step, the game loop catches up at most MAX_FRAME_TIME per frame
+FIXED_DT = 1 / 60
+MAX_FRAME_TIME = 0.25
+
+# when set, every game is recorded to a replay file in this directory
+REPLAY_DIR = None
+
+# per-phase frame profiler, F3 shows the overlay and F4 writes PROFILE_TRACE
+PROFILE = False
+PROFILE_FRAMES = 300
+PROFILE_TRACE = "trace.json"
+
+# endless mode builds the maze from CHUNK_SIZE square chunks around the player,
+# keeping at most CHUNK_CACHE of them and regenerating evicted ones from the seed
+ENDLESS = False
+CHUNK_SIZE = 16  # tiles, must be even
+CHUNK_CACHE = 64
+CHUNK_DOORS = 2  # openings into the next chunk on each side
+CHUNK_TUNNELS = 2
+CHUNK_COINS = 2
+
 HELP_AMOUNT = 40
 COIN_AMOUNT = 10
 BAT_AMOUNT = 3.0
@@ -0,0 +1,136 @@
+import random
+
+import pygame
+import settings as st
+from bat import Bat
+from level import Level
+from player import Player
+from profiler import profiler
+from scheduler import PathScheduler
+from swarm import BatSwarm
+from world import new_level
+
+# events returned by Simulation.step
+COIN = "coin"
+WIN = "win"
+LOSE = "lose"
+
+COLLISION = profiler.phase("collision")
+
+
+class Simulation:
+    """Game state and rules without a window, advanced with step()."""
+
+    def __init__(self, level: Level = None, seed: int = None) -> None:
+        # a swarm keeps the walls of the whole maze as one array
+        if st.SWARM and st.ENDLESS:
+            raise ValueError("SWARM needs a fixed maze and can't be used with ENDLESS")
+
+        # the level and every bat get their own stream derived from one seed
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        streams = random.Random(self.seed)
+        level_seed = streams.getrandbits(64)
+
+        # Initialize game objects
+        self.level = level or new_level(level_seed)
+        start_pos = self.level.absoulte_pos(self.level.start_pos)
+
+        self.end_rect = None  # endless levels have no exit
+        if self.level.end_pos is not None:
+            end_pos = self.level.absoulte_pos(self.level.end_pos)
+            self.end_rect = pygame.Rect(end_pos, (st.TILE_SIZE, st.TILE_SIZE))
+
+        self.player = Player(pygame.Rect(start_pos, (16, 16)))
+        self.bats: list[Bat] = []
+        self.scheduler = PathScheduler(
+            st.AI_REPLANS, st.AI_FIELD_CELLS, st.AI_FIELD_TICKS
+        )
+        self.swarm: BatSwarm = None
+
+        if st.SWARM:
+            positions = [
+                self.level.absoulte_pos(self.level.get_random_pos())
+                for _ in range(int(st.BAT_AMOUNT))
+            ]
+            self.swarm = BatSwarm(self.level, positions, streams.getrandbits(64))
+
+        for _ in range(0 if st.SWARM else int(st.BAT_AMOUNT)):
+            pos = self.level.absoulte_pos(self.level.get_random_pos())
+            rect = pygame.Rect(pos, (16, 16))
+            bat = Bat(rect, streams.getrandbits(64))
+            bat.scheduler = self.scheduler
+            self.bats.append(bat)
+
+        # a level may have been played before, start from these entities only
+        self.level.entities.clear()
+        self.level.entities.update((self.player, *self.bats))
+
+        self.ticks = 0
+        self.outcome = None
+        self.recorder = None  # replay.Recorder, if this run is being recorded
+
+    def handle_input(self, event_type: int, key: int) -> None:
+        if event_type == pygame.KEYDOWN:
+            self.player.handle_keydown(key)
+        if event_type == pygame.KEYUP:
+            self.player.handle_keyup(key)
+
+    def update(self, dt: float) -> None:
+        # Update player and bats
+        tiles = self.level.wall_index
+        self.player.update(dt, tiles)
+
+        for bat in self.bats:
+            bat.update(dt, tiles, self.player, self.level)
+
+        if self.swarm is not None:
+            self.swarm.update(dt, self.player)
+
+        self.level.entities.update((self.player, *self.bats))
+
+        # replans asked for by bats that reached a tile this tick
+        self.scheduler.run(self.level, self.player)
+
+    def step(self, dt: float, inputs=()) -> list[str]:
+        # inputs are (pygame.KEYDOWN or pygame.KEYUP, key) pairs
+        if self.outcome:
+            return []
+
+        if self.recorder and inputs:
+            self.recorder.record(self.ticks, inputs)
+
+        for event_type, key in inputs:
+            self.handle_input(event_type, key)
+
+        self.update(dt)
+        self.ticks += 1
+
+        with COLLISION:
+            # if player collides with coins del coin
+            events = [COIN] * len(self.level.coins.collect(self.player.rect))
+
+            # Check if player has reached the end
+            if self.end_rect and self.player.rect.colliderect(self.end_rect):
+                self.outcome = WIN
+            # if player collides with bat you lose, every other entity is a bat
+            elif self.level.entities.query(self.player.rect, self.player):
+                self.outcome = LOSE
+            elif self.swarm is not None and self.swarm.touching(self.player.rect):
+                self.outcome = LOSE
+
+        if self.outcome:
+            events.append(self.outcome)
+
+        return events
+
+    def run(self, ticks: int, dt: float = None, inputs=None) -> list[str]:
+        # fixed-step run as fast as possible, inputs(tick) gives that tick's keys
+        dt = dt or st.FIXED_DT
+        events = []
+
+        for tick in range(ticks):
+            events += self.step(dt, inputs(tick) if inputs else ())
+            if self.outcome:
+                break
+
+        return events
@@ -0,0 +1,316 @@
+import pygame
+import settings as st
+from bat import Bat
+from entity import Entity
+from grid import WALL
+
+try:
+    import numpy as np
+except ImportError:  # only swarm mode needs numpy
+    np = None
+
+# actions as stored in BatSwarm.action, the same animations a Bat plays
+ACTIONS = ("idle", "fly_left", "fly_right", "fly_up", "fly_down")
+IDLE, LEFT, RIGHT, UP, DOWN = range(len(ACTIONS))
+NO_DIRECTION = 0  # no current direction yet, shares the value of IDLE
+
+RANDOM_SPEED = 75  # pixels per second, as in Bat.move_randomly
+SEEK_SPEED = 50  # as in Bat.move_towards_player
+STUCK_TICKS = 10
+
+
+class BatSwarm:
+    """Every bat of a level as columns of NumPy arrays, updated all at once.
+
+    Bats follow the same rules as Bat: every second they idle, seek the
+    player or wander, wanderers turn when they hit a wall and seekers fly
+    tile by tile along the level's flow field. Stuck detection compares
+    each bat with where it was STUCK_TICKS ago instead of keeping a list.
+
+    Updates work on whole columns with np.where and np.copyto, picking bats
+    out with boolean indexing costs more than updating all of them.
+    """
+
+    def __init__(self, level, positions: list[tuple[int, int]], seed: int = None):
+        if np is None:
+            raise ImportError("Swarm mode needs numpy")
+        if level.maze is None:
+            raise ValueError("Swarms need a fixed maze, not an endless level")
+
+        self.level = level
+        self.rng = np.random.default_rng(seed)
+        count = len(positions)
+
+        # walls with the boundary around them, indexed [row + 1, column + 1]
+        maze = level.maze
+        walls = np.frombuffer(maze.wall_bytes(), np.uint8) == WALL
+        walls = walls.reshape(maze.height, maze.width)
+        self.walls = np.pad(walls, 1, constant_values=True)
+
+        position = np.array(positions, dtype=np.float64).reshape(count, 2)
+        self.x, self.y = position[:, 0].copy(), position[:, 1].copy()
+        self.action = np.full(count, RIGHT, np.int8)
+        self.direction = np.full(count, NO_DIRECTION, np.int8)
+        self.seeking = np.ones(count, bool)
+        self.timer = np.zeros(count)
+        # sides hit last tick, bits for left, right, top and bottom
+        self.collisions = np.zeros(count, np.int8)
+
+        # tile each seeker flies to, -1 when it has none
+        self.target_x = np.full(count, -1.0)
+        self.target_y = np.full(count, -1.0)
+
+        self.history = np.zeros((STUCK_TICKS, 2, count))
+        self.ticks = 0
+
+        self.load_animations()
+        self.frame = np.zeros(count, np.int16)
+        self.frame_time = np.zeros(count)
+
+        self.hops = None
+        self.hops_source = None
+
+    def __len__(self) -> int:
+        return len(self.x)
+
+    def load_animations(self) -> None:
+        # one Bat loads the animations every bat shares
+        Bat(pygame.Rect(0, 0, 16, 16))
+        animations = [Entity.animation[f"bat;{name}"] for name in ACTIONS]
+
+        shape = len(ACTIONS), max(len(animation) for animation in animations)
+        self.frame_count = np.array([len(animation) for animation in animations])
+        self.durations = np.ones(shape)
+        self.center_x = np.zeros(shape, np.int64)
+        self.center_y = np.zeros(shape, np.int64)
+        self.images = []
+
+        for action, animation in enumerate(animations):
+            for index, frame in enumerate(animation):
+                self.durations[action, index] = frame.duration
+                self.center_x[action, index] = frame.center_x
+                self.center_y[action, index] = frame.center_y
+            self.images.append([frame.image for frame in animation])
+
+    def set_action(self, which, action) -> None:
+        # like Entity.set_action, a new action starts its animation over
+        changed = which & (self.action != action)
+        np.copyto(self.action, action, where=which, casting="unsafe")
+        np.copyto(self.frame, 0, where=changed)
+        np.copyto(self.frame_time, 0, where=changed)
+
+    def random_direction(self, which) -> None:
+        # any direction but the current one, as in Bat.random_direction
+        if not which.any():
+            return
+
+        count = len(self)
+        turn = self.rng.integers(1, 4, count)
+        new = np.where(
+            self.direction == NO_DIRECTION,
+            self.rng.integers(LEFT, DOWN + 1, count),
+            (self.direction - LEFT + turn) % 4 + LEFT,
+        )
+        np.copyto(self.direction, new, where=which, casting="unsafe")
+        self.set_action(which, new)
+
+    def next_hops(self):
+        # the flow field as an array, converted again only after it changed
+        field = self.level.flow_field
+        if field.next_hop is not self.hops_source:
+            self.hops_source = field.next_hop
+            self.hops = np.array(field.next_hop, dtype=np.int64)
+
+        return self.hops
+
+    def update_frames(self, dt: float) -> None:
+        self.frame_time += dt
+        done = self.frame_time >= self.durations[self.action, self.frame]
+        np.copyto(self.frame_time, 0, where=done)
+
+        following = (self.frame + 1) % self.frame_count[self.action]
+        np.copyto(self.frame, following, where=done, casting="unsafe")
+
+    def move_randomly(self, dt: float, which) -> tuple:
+        self.random_direction(which & (self.direction == NO_DIRECTION))
+
+        speed = RANDOM_SPEED * dt
+        action = self.action
+        dx = np.where(action == LEFT, -speed, np.where(action == RIGHT, speed, 0))
+        dy = np.where(action == UP, -speed, np.where(action == DOWN, speed, 0))
+        return dx, dy
+
+    def move_towards_player(self, dt: float, seeking) -> tuple:
+        size = st.TILE_SIZE
+
+        # line up with the current tile first
+        lost = seeking & (self.target_x < 0)
+        self.target_x = np.where(lost, np.round(self.x / size), self.target_x)
+        self.target_y = np.where(lost, np.round(self.y / size), self.target_y)
+
+        difference_x = self.target_x * size - self.x
+        difference_y = self.target_y * size - self.y
+        far_x = np.abs(difference_x) > 1
+        far_y = np.abs(difference_y) > 1
+
+        # one axis at a time, as in Bat.move_towards_player
+        speed = SEEK_SPEED * dt
+        dx = np.where(far_x, np.clip(difference_x, -speed, speed), 0)
+        dy = np.where(far_x | ~far_y, 0, np.clip(difference_y, -speed, speed))
+
+        horizontal = np.where(difference_x > 0, RIGHT, LEFT)
+        vertical = np.where(difference_y > 0, DOWN, UP)
+        flying = seeking & (far_x | far_y)
+        self.set_action(flying, np.where(far_x, horizontal, vertical))
+
+        # arrived, snap onto the tile and take the next hop
+        arrived = seeking & ~far_x & ~far_y
+        dx = np.where(arrived, difference_x, dx)
+        dy = np.where(arrived, difference_y, dy)
+
+        hop = np.full(len(self), -1)
+        hops = self.next_hops()
+        if len(hops):
+            width, height = self.level.maze.width, self.level.maze.height
+            tile_x = self.target_x.astype(np.int64)
+            tile_y = self.target_y.astype(np.int64)
+            inside = (tile_x >= 0) & (tile_x < width)
+            inside &= (tile_y >= 0) & (tile_y < height)
+            index = np.where(inside, tile_y * width + tile_x, 0)
+            hop = np.where(arrived & inside, hops[index], -1)
+
+            moving_on = hop >= 0
+            self.target_x = np.where(moving_on, hop % width, self.target_x)
+            self.target_y = np.where(moving_on, hop // width, self.target_y)
+
+        # no path from here, wait on this tile
+        stopped = arrived & (hop < 0)
+        np.copyto(self.target_x, -1, where=stopped)
+        np.copyto(self.target_y, -1, where=stopped)
+
+        return dx, dy
+
+    def collide(self, position, other, movement, horizontal: bool) -> tuple:
+        # Entity.move_and_collide along one axis, bats are exactly one tile big.
+        # Returns which bats hit a wall moving forward and moving backward
+        size = st.TILE_SIZE
+        position += movement
+        pixel = position.astype(np.int64)
+        edge = np.where(movement > 0, (pixel + size - 1) // size, pixel // size)
+
+        across = other.astype(np.int64)
+        first, last = across // size, (across + size - 1) // size
+
+        if horizontal:  # walls are indexed [row, column]
+            hit = self.wall(first, edge) | self.wall(last, edge)
+        else:
+            hit = self.wall(edge, first) | self.wall(edge, last)
+
+        forward = hit & (movement > 0)
+        backward = hit & (movement < 0)
+        np.copyto(position, edge * size - size, where=forward)
+        np.copyto(position, (edge + 1) * size, where=backward)
+
+        return forward, backward
+
+    def wall(self, row, column):
+        rows, columns = self.walls.shape
+        row = np.clip(row + 1, 0, rows - 1)
+        column = np.clip(column + 1, 0, columns - 1)
+        return self.walls.ravel()[row * columns + column]
+
+    def update(self, dt: float, player) -> None:
+        self.update_frames(dt)
+        seeking = self.seeking
+        level = self.level
+
+        # the scheduler keeps the field up to date unless bats use the oracle
+        if level.oracle is not None:
+            target = level.tile_pos(player.rect.topleft)
+            cells = level.flow_field.budget(st.AI_FIELD_CELLS, st.AI_FIELD_TICKS)
+            level.flow_field.advance(target, cells)
+
+        # move, idle bats stay where they are
+        wandering = ~seeking & (self.action != IDLE)
+        random_x, random_y = self.move_randomly(dt, wandering)
+        seek_x, seek_y = self.move_towards_player(dt, seeking)
+        dx = np.where(seeking, seek_x, np.where(wandering, random_x, 0))
+        dy = np.where(seeking, seek_y, np.where(wandering, random_y, 0))
+
+        right, left = self.collide(self.x, self.y, dx, True)
+        bottom, top = self.collide(self.y, self.x, dy, False)
+        collisions = left | right << 1 | top << 2 | bottom << 3
+
+        # wanderers that hit something new snap to a tile and turn around
+        bounced = (collisions != self.collisions) & (collisions != 0) & ~seeking
+        self.collisions = collisions.astype(np.int8)
+        self.snap(bounced)
+        self.random_direction(bounced)
+
+        # bats trying to move that haven't for a while snap back onto a tile
+        history = self.history[self.ticks % STUCK_TICKS]
+        if self.ticks >= STUCK_TICKS:
+            still = np.abs(self.x - history[0]) < 1
+            still &= np.abs(self.y - history[1]) < 1
+            self.snap(still & ((dx != 0) | (dy != 0)))
+        history[0], history[1] = self.x, self.y
+        self.ticks += 1
+
+        self.handle_ai_changes(dt)
+
+    def snap(self, which) -> None:
+        size = st.TILE_SIZE
+        np.copyto(self.x, np.round(self.x / size) * size, where=which)
+        np.copyto(self.y, np.round(self.y / size) * size, where=which)
+
+    def handle_ai_changes(self, dt: float) -> None:
+        self.timer -= dt
+        due = self.timer <= 0
+        if not due.any():
+            return
+        np.copyto(self.timer, 1, where=due)
+
+        # same odds as Bat.handle_ai_changes
+        first = self.rng.random(len(self))
+        second = self.rng.random(len(self))
+        idle = due & (first < 0.20)
+        seek = due & ~idle & (second < 0.33)
+        wander = due & ~idle & ~seek
+
+        self.set_action(idle, IDLE)
+        self.set_action(seek, RIGHT)
+        np.copyto(self.direction, RIGHT, where=idle | seek)
+
+        np.copyto(self.seeking, True, where=seek)
+        np.copyto(self.seeking, False, where=wander)
+        np.copyto(self.target_x, -1, where=wander)
+        np.copyto(self.target_y, -1, where=wander)
+
+    def touching(self, rect: pygame.Rect) -> bool:
+        # bats are as big as a tile, like their rects
+        size = st.TILE_SIZE
+        x, y = self.x.astype(np.int64), self.y.astype(np.int64)
+        overlap_x = (x < rect.right) & (rect.left < x + size)
+        overlap_y = (y < rect.bottom) & (rect.top < y + size)
+        return bool(np.any(overlap_x & overlap_y))
+
+    def draw(self, surface: pygame.Surface, view: pygame.Rect) -> list[pygame.Rect]:
+        # only the bats in view, in one blits() call
+        size = st.TILE_SIZE
+        x, y = self.x.astype(np.int64), self.y.astype(np.int64)
+        visible = (x > view.left - size * 2) & (x < view.right + size)
+        visible &= (y > view.top - size * 2) & (y < view.bottom + size)
+
+        index = np.flatnonzero(visible)
+        action, frame = self.action[index], self.frame[index]
+        left = x[index] - view.x + self.center_x[action, frame]
+        top = y[index] - view.y + self.center_y[action, frame]
+
+        images = self.images
+        blits = [
+            (images[a][f], (l, t))
+            for a, f, l, t in zip(
+                action.tolist(), frame.tolist(), left.tolist(), top.tolist()
+            )
+        ]
+        return surface.blits(blits)
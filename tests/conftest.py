@@ -0,0 +1,18 @@
+import os
+import sys
+
+import pytest
+
+# tests never open a window and import the game's modules from the root
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture(autouse=True)
+def game_directory(monkeypatch):
+    # images are loaded relative to the working directory, like in the game
+    monkeypatch.chdir(ROOT)
@@ -0,0 +1,23 @@
+import batch
+
+
+def test_main_returns(tmp_path):
+    output = tmp_path / "runs.jsonl"
+    argv = "--size-x 15 --size-y 11 --help-amount 4 --coin-amount 3 --runs 2"
+    argv += " --workers 1 --max-ticks 300"
+    summary = batch.main([*argv.split(), "--output", str(output)])
+
+    assert len(output.read_text().splitlines()) == 2
+    assert summary[0]["runs"] == 2
+    assert summary[0]["unreachable"] == 0
+    assert summary[0]["mean_shortest_path"] > 0
+
+
+def test_unreachable_runs_left_out_of_the_mean():
+    results = [
+        {"profile": {}, "outcome": "lose", "ticks": 10, "coins": 0, "shortest_path": p}
+        for p in (10, 20, -1)
+    ]
+    summary = batch.summarise(results)[0]
+    assert summary["mean_shortest_path"] == 15
+    assert summary["unreachable"] == 1
@@ -0,0 +1,82 @@
+import random
+
+import mazegen
+from corridors import CorridorGraph
+from grid import AIR, TUNNEL, WALL, Grid
+from pathfinder import FlowField
+
+
+def random_mazes(count: int):
+    # perfect mazes with a few tunnels knocked through, and open grids
+    rng = random.Random(0)
+    for n in range(count):
+        width, height = rng.randint(3, 30), rng.randint(3, 30)
+        if n % 3 == 0:
+            maze = Grid(width, height, AIR)
+            for index in range(len(maze)):
+                if rng.random() < 0.25:
+                    maze.cells[index] = WALL
+        else:
+            maze = Grid(width, height)
+            start = rng.randrange(width), rng.randrange(height)
+            mazegen.GENERATORS[rng.choice(list(mazegen.GENERATORS))](maze, start, rng)
+            for index in rng.sample(range(len(maze)), len(maze) // 20):
+                if maze.cells[index] == WALL:
+                    maze.cells[index] = TUNNEL
+
+        yield rng, maze
+
+
+def open_cells(maze: Grid) -> list[tuple[int, int]]:
+    return [coord for coord, cell in maze.items() if cell != WALL]
+
+
+def test_distances_match_bfs():
+    for rng, maze in random_mazes(150):
+        cells = open_cells(maze)
+        if not cells:
+            continue
+
+        graph = CorridorGraph(maze)
+        for _ in range(5):
+            end = rng.choice(cells)
+            field = FlowField(maze)
+            field.update(end)
+            for start in rng.sample(cells, min(10, len(cells))):
+                assert graph.distance(start, end) == field.distance_to(*start)
+
+
+def test_paths_are_shortest_walks():
+    for rng, maze in random_mazes(60):
+        cells = open_cells(maze)
+        if not cells:
+            continue
+
+        graph = CorridorGraph(maze)
+        for _ in range(10):
+            start, end = rng.choice(cells), rng.choice(cells)
+            distance = graph.distance(start, end)
+            path = list(graph.path(start, end))
+            if distance == -1:
+                assert path == []
+                continue
+
+            assert len(path) == distance + 1
+            assert path[0] == start and path[-1] == end
+            for (x, y), (next_x, next_y) in zip(path, path[1:]):
+                assert abs(x - next_x) + abs(y - next_y) == 1
+                assert maze.get(next_x, next_y) != WALL
+
+            step = graph.next_step(start, end)
+            assert step == (path[1] if len(path) > 1 else None)
+
+
+def test_walls_and_outside_have_no_path():
+    maze = Grid(5, 5)
+    mazegen.carve_backtracker(maze, (0, 0), random.Random(1))
+    graph = CorridorGraph(maze)
+    wall = next(coord for coord, cell in maze.items() if cell == WALL)
+
+    assert graph.distance((0, 0), wall) == -1
+    assert graph.distance((0, 0), (5, 0)) == -1
+    assert list(graph.path((0, 0), wall)) == []
@@ -0,0 +1,97 @@
+import random
+
+import levelfile
+import pygame
+import pytest
+import settings as st
+from level import Level
+
+
+@pytest.fixture(autouse=True)
+def small_level(monkeypatch):
+    monkeypatch.setattr(st, "SIZE_X", 21)
+    monkeypatch.setattr(st, "SIZE_Y", 15)
+    monkeypatch.setattr(st, "HELP_AMOUNT", 6)
+    monkeypatch.setattr(st, "COIN_AMOUNT", 5)
+    pygame.display.set_mode((64, 64))
+
+
+@pytest.mark.parametrize("bits", levelfile.WIDTHS)
+def test_bits_round_trip(bits):
+    rng = random.Random(bits)
+    for count in range(20):
+        values = bytes(rng.randrange(1 << bits) for _ in range(count))
+        packed = levelfile.pack_bits(values, bits)
+        assert len(packed) == levelfile.packed_size(count, bits)
+        assert levelfile.unpack_bits(packed, bits, count) == values
+
+
+def test_levels_round_trip(tmp_path):
+    path = str(tmp_path / "levels.pack")
+    levels = [Level(seed) for seed in range(3)]
+    levelfile.save(levels, path)
+
+    with levelfile.LevelPack(path) as pack:
+        assert len(pack) == len(levels)
+        for level, record in zip(levels, pack):
+            assert record.seed == level.seed
+            assert (record.start, record.end) == (level.start_pos, level.end_pos)
+            assert record.grid().cells == level.maze.cells
+            assert record.variants() == level.variants
+            for (x, y), cell in level.maze.items():
+                assert record.cell(x, y) == cell
+
+    for index, level in enumerate(levels):
+        loaded = Level.load(path, index)
+        assert loaded.maze.cells == level.maze.cells
+        assert loaded.variants == level.variants
+        assert loaded.tile_selections.keys() == level.tile_selections.keys()
+
+
+def test_variants_take_fewer_bits(tmp_path):
+    path = str(tmp_path / "level.pack")
+    level = Level(4)
+    level.save(path)
+
+    with levelfile.LevelPack(path) as pack:
+        size = len(levelfile.encode(level))
+        assert size < levelfile.RECORD.size + len(level.maze) // 4 + len(level.maze)
+        assert pack[0].widths[1] < 8  # walls pick from a handful of tiles
+
+
+def test_closed_pack_refuses_reads(tmp_path):
+    path = str(tmp_path / "level.pack")
+    Level(5).save(path)
+
+    pack = levelfile.LevelPack(path)
+    record = pack[0]
+    pack.close()
+    with pytest.raises(ValueError):
+        record.grid()
+
+
+@pytest.mark.parametrize("size", [0, 5, levelfile.HEADER.size + 4])
+def test_cut_off_header_is_not_a_pack(tmp_path, size):
+    path = tmp_path / "level.pack"
+    Level(6).save(str(path))
+    path.write_bytes(path.read_bytes()[:size])
+
+    with pytest.raises(ValueError, match="Not a level pack"):
+        levelfile.LevelPack(str(path))
+
+
+def test_cut_off_record(tmp_path):
+    path = tmp_path / "level.pack"
+    Level(6).save(str(path))
+    path.write_bytes(path.read_bytes()[:-10])
+
+    with levelfile.LevelPack(str(path)) as pack:
+        with pytest.raises(ValueError, match="cut off"):
+            pack[0]
+
+
+def test_not_a_pack(tmp_path):
+    path = tmp_path / "other.pack"
+    path.write_bytes(b"something else entirely")
+    with pytest.raises(ValueError, match="Not a level pack"):
+        levelfile.LevelPack(str(path))
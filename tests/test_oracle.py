@@ -0,0 +1,69 @@
+import os
+import random
+
+import mazegen
+import oracle
+from grid import Grid
+
+
+def small_maze(seed: int) -> Grid:
+    maze = Grid(9, 7)
+    mazegen.carve_backtracker(maze, (0, 0), random.Random(seed))
+    return maze
+
+
+def test_truncated_file_is_rebuilt(tmp_path):
+    maze = small_maze(0)
+    table = oracle.load_or_build(maze, str(tmp_path), 4096, 4, 8)
+    path = tmp_path / f"{oracle.maze_key(maze)}.oracle"
+
+    data = path.read_bytes()
+    path.write_bytes(data[: len(data) // 2])
+
+    rebuilt = oracle.load_or_build(maze, str(tmp_path), 4096, 4, 8)
+    assert rebuilt.payload() == table.payload()
+    assert path.read_bytes() == data
+
+
+def test_file_of_another_kind_is_rebuilt(tmp_path):
+    maze = small_maze(1)
+    oracle.load_or_build(maze, str(tmp_path), 4096, 4, 8)
+
+    # a lower limit asks for landmarks instead of the full table on disk
+    table = oracle.load_or_build(maze, str(tmp_path), 0, 2, 8)
+    assert table.kind == oracle.LANDMARKS
+    assert len(table.distances) == 2
+
+
+def test_cache_keeps_the_most_recent_files(tmp_path):
+    mazes = [small_maze(seed) for seed in range(5)]
+    for age, maze in enumerate(mazes):
+        oracle.load_or_build(maze, str(tmp_path), 4096, 4, 3)
+        path = tmp_path / f"{oracle.maze_key(maze)}.oracle"
+        os.utime(path, (age, age))  # mtimes can tie within one test
+
+    names = sorted(os.listdir(tmp_path))
+    kept = sorted(f"{oracle.maze_key(maze)}.oracle" for maze in mazes[2:])
+    assert names == kept
+
+
+def test_evict_skips_files_removed_by_another_process(tmp_path, monkeypatch):
+    for seed in range(4):
+        oracle.load_or_build(small_maze(seed), str(tmp_path), 4096, 4, 8)
+
+    # another process deletes each file right after we list it
+    getmtime = os.path.getmtime
+
+    def removed_meanwhile(path):
+        os.remove(path)
+        return getmtime(path)
+
+    monkeypatch.setattr(os.path, "getmtime", removed_meanwhile)
+    oracle.evict(str(tmp_path), 1)
+    assert os.listdir(tmp_path) == []
+
+
+def test_save_leaves_only_the_finished_file(tmp_path):
+    maze = small_maze(2)
+    oracle.load_or_build(maze, str(tmp_path), 4096, 4, 8)
+    assert os.listdir(tmp_path) == [f"{oracle.maze_key(maze)}.oracle"]
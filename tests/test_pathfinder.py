@@ -0,0 +1,89 @@
+import random
+
+import mazegen
+import pytest
+from grid import AIR, WALL, Grid
+from pathfinder import FlowField, astar, bfs, jps
+
+
+def random_grids(count: int):
+    # perfect mazes from every generator plus open grids with scattered walls
+    rng = random.Random(0)
+    for n in range(count):
+        width, height = rng.randint(2, 40), rng.randint(2, 40)
+        if n % 3 == 0:
+            maze = Grid(width, height, AIR)
+            for index in range(len(maze)):
+                if rng.random() < 0.3:
+                    maze.cells[index] = WALL
+        else:
+            maze = Grid(width, height)
+            start = rng.randrange(width), rng.randrange(height)
+            mazegen.GENERATORS[rng.choice(list(mazegen.GENERATORS))](maze, start, rng)
+
+        for _ in range(5):
+            start = rng.randrange(height), rng.randrange(width)
+            end = rng.randrange(height), rng.randrange(width)
+            yield maze, start, end
+
+
+def assert_walkable(maze: Grid, path, start, end) -> None:
+    assert path[0] == start and path[-1] == end
+    for (row, col), (next_row, next_col) in zip(path, path[1:]):
+        assert abs(row - next_row) + abs(col - next_col) == 1
+        assert maze.get(next_col, next_row) != WALL
+
+
+@pytest.mark.parametrize("search", [astar, jps])
+def test_same_length_as_bfs(search):
+    for maze, start, end in random_grids(300):
+        grid = maze.wall_rows()
+        expected = bfs(grid, start, end) if not grid[start[0]][start[1]] else []
+
+        path = search(maze, start, end)
+        assert len(path) == len(expected)
+        if path:
+            assert_walkable(maze, path, start, end)
+
+
+@pytest.mark.parametrize("search", [astar, jps])
+def test_workspace_reuse_across_queries(search):
+    # the same workspace serves mazes of one size, stale stamps must not leak
+    rng = random.Random(1)
+    for _ in range(20):
+        maze = Grid(17, 13)
+        mazegen.carve_backtracker(maze, (0, 0), rng)
+        grid = maze.wall_rows()
+        assert len(search(maze, (0, 0), (12, 16))) == len(bfs(grid, (0, 0), (12, 16)))
+
+
+@pytest.mark.parametrize("search", [astar, jps])
+def test_blocked_ends(search):
+    maze = Grid(5, 5, AIR)
+    maze.set(2, 0, WALL)
+    maze.set(2, 1, WALL)
+    maze.set(2, 2, WALL)
+    maze.set(2, 3, WALL)
+    maze.set(2, 4, WALL)
+
+    assert search(maze, (0, 0), (0, 4)) == []  # cut off by the wall column
+    assert search(maze, (0, 0), (0, 2)) == []  # the end is a wall
+    assert search(maze, (0, 0), (0, 0)) == [(0, 0)]
+
+
+def test_field_budget_finishes_in_time():
+    maze = Grid(200, 150)
+    mazegen.GENERATORS["kruskal"](maze, (0, 0), random.Random(1))
+    field = FlowField(maze)
+    cells = field.budget(64, 10)
+    assert cells * 10 >= field.open_cells > 64 * 10
+
+    # every open cell is reached within the ticks the budget was made for
+    calls = 1
+    while not field.advance((0, 0), cells):
+        calls += 1
+    assert calls <= 10
+
+    whole = FlowField(maze)
+    whole.update((0, 0))
+    assert field.distance == whole.distance
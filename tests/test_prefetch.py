@@ -0,0 +1,40 @@
+import pygame
+import pytest
+import settings as st
+from level import Level, LevelParams
+from prefetch import LevelPrefetcher
+from simulation import Simulation
+
+
+@pytest.fixture(autouse=True)
+def small_level(monkeypatch):
+    monkeypatch.setattr(st, "SIZE_X", 21)
+    monkeypatch.setattr(st, "SIZE_Y", 15)
+    monkeypatch.setattr(st, "HELP_AMOUNT", 6)
+    monkeypatch.setattr(st, "COIN_AMOUNT", 5)
+    pygame.display.set_mode((64, 64))
+
+
+def test_prefetched_level_matches_a_built_one():
+    prefetcher = LevelPrefetcher()
+    current = LevelParams.current()
+    prefetcher.prefetch(current)
+    prefetcher.prefetch(current._replace(coins=8))
+
+    simulation = prefetcher.take()
+    assert not prefetcher.pending  # the level for the other outcome is dropped
+
+    # the same level and bats as a simulation that built its level itself
+    built = Simulation(seed=simulation.seed)
+    assert simulation.level.maze.cells == built.level.maze.cells
+    assert simulation.level.variants == built.level.variants
+    assert simulation.level.params == current
+    assert [bat.rect for bat in simulation.bats] == [bat.rect for bat in built.bats]
+
+
+def test_loaded_level_has_params(tmp_path):
+    path = str(tmp_path / "level.pack")
+    level = Level(3)
+    level.save(path)
+
+    assert Level.load(path).params == level.params
@@ -0,0 +1,99 @@
+import io
+import json
+import random
+
+import pygame
+import pytest
+import replay
+import settings as st
+from simulation import Simulation
+
+KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+
+@pytest.fixture(autouse=True)
+def small_level(monkeypatch):
+    monkeypatch.setattr(st, "SIZE_X", 15)
+    monkeypatch.setattr(st, "SIZE_Y", 11)
+    monkeypatch.setattr(st, "HELP_AMOUNT", 4)  # tunnels, a small maze has few spots
+    monkeypatch.setattr(st, "COIN_AMOUNT", 3)
+    monkeypatch.setattr(st, "BAT_AMOUNT", 4.0)
+
+
+def random_inputs(seed: int):
+    # a random arrow key held for a while, the way a player would
+    rng = random.Random(seed)
+    held = None
+
+    def inputs(tick: int):
+        nonlocal held
+        if tick % 20:
+            return []
+        events = [(pygame.KEYUP, held)] if held is not None else []
+        held = rng.choice(KEYS)
+        return events + [(pygame.KEYDOWN, held)]
+
+    return inputs
+
+
+def state(simulation: Simulation) -> tuple:
+    rects = [simulation.player.rect, *(bat.rect for bat in simulation.bats)]
+    return simulation.ticks, simulation.outcome, [tuple(rect) for rect in rects]
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_replay_plays_out_the_same(tmp_path, seed):
+    path = str(tmp_path / "run.replay")
+    simulation = Simulation(seed=seed)
+    simulation.recorder = replay.Recorder(path, simulation)
+    simulation.run(600, inputs=random_inputs(seed))
+    simulation.recorder.close()
+
+    recorded = replay.Replay(path)
+    assert recorded.seed == seed
+    assert recorded.ticks == simulation.ticks
+
+    replayed, _ = recorded.play()
+    assert state(replayed) == state(simulation)
+
+
+def test_same_seed_same_run():
+    runs = [Simulation(seed=7) for _ in range(2)]
+    for simulation in runs:
+        simulation.run(300, inputs=random_inputs(7))
+
+    assert state(runs[0]) == state(runs[1])
+
+
+def test_replay_without_a_setting_is_refused(tmp_path):
+    path = str(tmp_path / "old.replay")
+    simulation = Simulation(seed=1)
+    simulation.recorder = replay.Recorder(path, simulation)
+    simulation.recorder.close()
+
+    # rewrite the settings without ORACLE, as a replay from before it was kept
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, version, seed, level_seed, dt, size = replay.HEADER.unpack_from(data)
+    settings = json.loads(data[replay.HEADER.size : replay.HEADER.size + size])
+    del settings["ORACLE"]
+    encoded = json.dumps(settings).encode()
+    header = replay.HEADER.pack(magic, version, seed, level_seed, dt, len(encoded))
+    with open(path, "wb") as file:
+        file.write(header + encoded + data[replay.HEADER.size + size :])
+
+    with pytest.raises(ValueError, match="ORACLE"):
+        replay.Replay(path)
+
+
+def test_varints_round_trip():
+    values = [0, 1, 127, 128, 300, 2**21, 2**40]
+    file = io.BytesIO()
+    for value in values:
+        replay.write_varint(file, value)
+
+    data, offset = file.getvalue(), 0
+    for value in values:
+        decoded, offset = replay.read_varint(data, offset)
+        assert decoded == value
+    assert offset == len(data)
@@ -0,0 +1,62 @@
+from functools import lru_cache
+
+import pygame
+
+
+@lru_cache(maxsize=None)
+def get_font(size: int, name: str = "Arial") -> pygame.font.Font:
+    # SysFont searches the system fonts, so each size is only looked up once
+    return pygame.font.SysFont(name, size)
+
+
+@lru_cache(maxsize=256)
+def render_text(text: str, size: int, color, name: str = "Arial") -> pygame.Surface:
+    # shared surface, copy() it before drawing onto it
+    return get_font(size, name).render(text, True, color)
+
+
+def hover_color(color) -> pygame.Color:
+    return pygame.Color(color).lerp((255, 255, 255), 0.35)
+
+
+class Button:
+    """Button drawn once per state, centered on position."""
+
+    def __init__(
+        self,
+        text: str,
+        position: tuple[int, int],
+        rect_size: tuple[int, int],
+        size: int,
+        text_color,
+        background_color,
+    ) -> None:
+        self.rect = pygame.Rect((0, 0), rect_size)
+        self.rect.center = position
+        self.hovered = False
+
+        self.surfaces = {
+            False: self.prerender(text, size, text_color, background_color),
+            True: self.prerender(
+                text, size, text_color, hover_color(background_color)
+            ),
+        }
+
+    def prerender(self, text, size, text_color, background_color) -> pygame.Surface:
+        surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+        area = surface.get_rect()
+        pygame.draw.rect(surface, background_color, area, border_radius=5)
+
+        text_render = render_text(text, size, text_color)
+        surface.blit(text_render, text_render.get_rect(center=area.center))
+        return surface
+
+    def hover(self, mouse: tuple[int, int]) -> bool:
+        # True when the hover state changed and the button needs a redraw
+        hovered = bool(self.rect.collidepoint(mouse))
+        changed = hovered != self.hovered
+        self.hovered = hovered
+        return changed
+
+    def draw(self, screen: pygame.Surface) -> pygame.Rect:
+        return screen.blit(self.surfaces[self.hovered], self.rect)
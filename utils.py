@@ -1,6 +1,6 @@
-import os
-
 import pygame
+from assets import assets
+from ui import render_text
 
 
 class Frame:
@@ -8,6 +8,17 @@ class Frame:
         self.image = image
         self.duration = duration
 
+        # mirrored copy and half extents are made once, not every frame
+        self.flipped = pygame.transform.flip(image, True, False)
+        if (colorkey := image.get_colorkey()) is not None:
+            self.flipped.set_colorkey(colorkey, pygame.RLEACCEL)
+
+        self.half_width = image.get_width() / 2
+        self.half_height = image.get_height() / 2
+        # what's left of the center after blit_center rounds it down
+        self.center_x = self.half_width - int(self.half_width)
+        self.center_y = self.half_height - int(self.half_height)
+
 
 class Animation(list[Frame]):
     def __init__(self, frames: list[Frame] = None, tags: list[str] = None) -> None:
@@ -52,13 +63,8 @@ def flip(
 
 
 def load_image(file: str, colorkey: pygame.Color = "#FFFFFF") -> pygame.Surface:
-    path = os.path.join("images", f"{file}.png")
-    image = pygame.image.load(path).convert()
-
-    if colorkey:
-        image.set_colorkey(pygame.Color(colorkey))
-
-    return image
+    # shared atlas handle, copy() it before drawing onto it
+    return assets.image(file, colorkey)
 
 
 def load_animation(
@@ -95,7 +101,7 @@ def load_animation(
             if i < start_frame or i >= end_frame:
                 continue
 
-            image.set_colorkey(colorkey)
+            image.set_colorkey(colorkey, pygame.RLEACCEL)
 
             frames.append(Frame(image, duration))
 
@@ -108,28 +114,13 @@ def load_animation(
 def load_spritesheet(
     file: str, sprite_size: tuple[int, int], colorkey: pygame.Color = "#FFFFFF"
 ) -> list[pygame.Surface]:
-    sprite_sheet = load_image(file, None)
-
-    sheet_width = sprite_sheet.get_width()
-    sprite_width, sprite_height = sprite_size
-    num_sprites = sheet_width // sprite_width
-
-    sprites = []
-    for i in range(num_sprites):
-        rect = pygame.Rect(i * sprite_width, 0, sprite_width, sprite_height)
-        sprite = pygame.Surface(sprite_size)
-
-        sprite.set_colorkey(pygame.Color(colorkey))
-
-        sprite.blit(sprite_sheet, (0, 0), rect)
-        sprites.append(sprite)
-
-    return sprites
+    # each sheet is decoded once, the sprites are shared atlas handles
+    return assets.sheet(file, sprite_size, colorkey)
 
 
 def button(screen, text, position, rect_size, size, text_color, background_color):
-    font = pygame.font.SysFont("Arial", size)
-    text_render = font.render(text, True, text_color)
+    # immediate-mode version of ui.Button, the text render is cached
+    text_render = render_text(text, size, text_color)
     text_width, text_height = text_render.get_size()
     rect_width, rect_height = rect_size
 
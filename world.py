@@ -0,0 +1,316 @@
+import random
+from collections import OrderedDict
+
+import mazegen
+import pygame
+import settings as st
+from grid import AIR, COIN, TUNNEL, WALL, Grid
+from level import CoinStore, Level, TileIndex
+from pathfinder import FlowField
+
+
+def chunk_rng(seed: int, *key) -> random.Random:
+    # string seeds hash the same way in every process, unlike hash(tuple)
+    return random.Random(":".join(str(part) for part in (seed, *key)))
+
+
+def generate_chunk(seed: int, chunk_x: int, chunk_y: int, size: int) -> Grid:
+    """Cells of one chunk, the same every time for the same seed.
+
+    The maze is carved in the chunk minus its last row and column, which
+    stay walls except for a few doors. Lattice cells sit on even world
+    coordinates, so every door opens onto a passage of the next chunk.
+    """
+    rng = chunk_rng(seed, chunk_x, chunk_y)
+
+    inner = Grid(size - 1, size - 1)
+    mazegen.GENERATORS[st.MAZE_ALGORITHM](inner, (0, 0), rng)
+
+    chunk = Grid(size, size)
+    for y in range(size - 1):
+        chunk.cells[y * size : y * size + size - 1] = inner.row(y)
+
+    # doors into the chunks to the east and south
+    lattice = range(0, size - 1, 2)
+    for row in rng.sample(lattice, min(st.CHUNK_DOORS, len(lattice))):
+        chunk.set(size - 1, row, AIR)
+    for column in rng.sample(lattice, min(st.CHUNK_DOORS, len(lattice))):
+        chunk.set(column, size - 1, AIR)
+
+    # same tunnel rules as Level.add_tunnels, kept inside the chunk
+    candidates = []
+    for y in range(1, size - 2):
+        for x in range(1, size - 2):
+            if chunk.get(x, y) != WALL:
+                continue
+            left, right = chunk.get(x - 1, y), chunk.get(x + 1, y)
+            up, down = chunk.get(x, y - 1), chunk.get(x, y + 1)
+            horizontal = left == right == WALL and up == down == AIR
+            vertical = up == down == WALL and left == right == AIR
+            if horizontal or vertical:
+                candidates.append((x, y))
+
+    for x, y in rng.sample(candidates, min(st.CHUNK_TUNNELS, len(candidates))):
+        chunk.set(x, y, TUNNEL)
+
+    air = [(x, y) for (x, y), cell in chunk.items() if cell == AIR]
+    for x, y in rng.sample(air, min(st.CHUNK_COINS, len(air))):
+        chunk.set(x, y, COIN)
+
+    return chunk
+
+
+class Chunk:
+    """Tile surfaces, wall rects and coins of one chunk, in world tiles."""
+
+    def __init__(self, level: "EndlessLevel", chunk_x: int, chunk_y: int) -> None:
+        size, tile_size = st.CHUNK_SIZE, st.TILE_SIZE
+        grid = level.grid(chunk_x, chunk_y)
+        rng = chunk_rng(level.seed, chunk_x, chunk_y, "tiles")
+
+        self.tiles: dict[tuple[int, int], pygame.Surface] = {}
+        self.walls = TileIndex(tile_size)
+        self.coins = CoinStore(tile_size)
+
+        left, top = chunk_x * size, chunk_y * size
+        for (x, y), cell in grid.items():
+            coord = left + x, top + y
+            position = coord[0] * tile_size, coord[1] * tile_size
+            rect = pygame.Rect(position, (tile_size, tile_size))
+
+            if cell == WALL:
+                # same choice as Level.get_wall_tile, the cell below may be
+                # in the next chunk down
+                if y + 1 < size:
+                    below = grid.get(x, y + 1)
+                else:
+                    below = level.cell(coord[0], coord[1] + 1)
+                if below == AIR:
+                    self.tiles[coord] = rng.choice(level.up_down_tiles)
+                else:
+                    self.tiles[coord] = rng.choice(level.left_right_tiles)
+                self.walls.add(coord, rect)
+                continue
+
+            tile = rng.choice(level.background_tiles)
+            if cell == TUNNEL:
+                tile = tile.copy()
+                tile.blit(rng.choice(level.tunnels_tiles), (0, 0))
+            elif cell == COIN and coord not in level.collected_coins:
+                self.coins.add(coord, rect)
+            self.tiles[coord] = tile
+
+        if level.start_pos in self.tiles:
+            entrance = self.tiles[level.start_pos].copy()
+            entrance.blit(level.entrance_image, (0, 0))
+            self.tiles[level.start_pos] = entrance
+
+
+class ChunkIndex(TileIndex):
+    """TileIndex over the chunks, building the ones it's asked about."""
+
+    def __init__(self, level: "EndlessLevel", attribute: str) -> None:
+        super().__init__(st.TILE_SIZE)
+        self.level = level
+        self.attribute = attribute
+
+    def index_at(self, coord: tuple[int, int]) -> TileIndex:
+        return getattr(self.level.chunk_at(coord), self.attribute)
+
+    def query(self, rect: pygame.Rect) -> list[pygame.Rect]:
+        found = []
+        for coord in self.covered(rect):
+            tile = self.index_at(coord).rects.get(coord)
+            if tile is not None:
+                found.append(tile)
+
+        return found
+
+    def __iter__(self):
+        # only what is built right now
+        for chunk in self.level.chunks.values():
+            yield from getattr(chunk, self.attribute)
+
+    def __len__(self) -> int:
+        chunks = self.level.chunks.values()
+        return sum(len(getattr(chunk, self.attribute)) for chunk in chunks)
+
+
+class ChunkCoins(ChunkIndex):
+    """CoinStore over the chunks, picked up coins stay gone after eviction."""
+
+    def __init__(self, level: "EndlessLevel") -> None:
+        super().__init__(level, "coins")
+        self.collected = 0
+        self.cleared: list[pygame.Rect] = []
+
+    def collect(self, rect: pygame.Rect) -> list[pygame.Rect]:
+        picked = []
+        for coord in self.covered(rect):
+            store = self.index_at(coord)
+            coin = store.rects.get(coord)
+            if coin is not None and rect.colliderect(coin):
+                del store.rects[coord]
+                self.level.collected_coins.add(coord)
+                picked.append(coin)
+
+        self.collected += len(picked)
+        self.cleared += picked
+        return picked
+
+
+class ChunkTiles:
+    """Read-only tile_selections lookup that builds chunks on demand."""
+
+    def __init__(self, level: "EndlessLevel") -> None:
+        self.level = level
+
+    def get(self, coord: tuple[int, int], default=None) -> pygame.Surface:
+        return self.level.chunk_at(coord).tiles.get(coord, default)
+
+
+class WindowFlowField:
+    """FlowField over the chunks around its target, in world tiles.
+
+    Cells outside the window have no next step, so bats that are far
+    away wander until the player comes closer.
+    """
+
+    def __init__(self, level: "EndlessLevel", radius: int = 1) -> None:
+        self.level = level
+        self.radius = radius
+        self.origin = None
+        self.field: FlowField = None
+        self.target = None
+
+    def update(self, target: tuple[int, int]) -> bool:
+        if target == self.target:
+            return False
+        self.target = target
+
+        size, radius = st.CHUNK_SIZE, self.radius
+        chunk_x, chunk_y = target[0] // size, target[1] // size
+        origin = (chunk_x - radius) * size, (chunk_y - radius) * size
+
+        # copy the grids of the chunks around the target into one window
+        if origin != self.origin:
+            span = radius * 2 + 1
+            window = Grid(span * size, span * size)
+            for j in range(span):
+                for i in range(span):
+                    grid = self.level.grid(chunk_x + i - radius, chunk_y + j - radius)
+                    for y in range(size):
+                        start = (j * size + y) * window.width + i * size
+                        window.cells[start : start + size] = grid.row(y)
+
+            self.origin = origin
+            self.field = FlowField(window)
+
+        self.field.update((target[0] - origin[0], target[1] - origin[1]))
+        return True
+
+    def budget(self, cells: int, ticks: int) -> int:
+        return cells  # advance() doesn't need one
+
+    def advance(self, target: tuple[int, int], limit: int) -> bool:
+        # windows are a few chunks, small enough to update in one go
+        return self.update(target)
+
+    def distance_to(self, x: int, y: int) -> int:
+        if self.field is None:
+            return -1
+        return self.field.distance_to(x - self.origin[0], y - self.origin[1])
+
+    def next_step(self, x: int, y: int) -> tuple[int, int] | None:
+        if self.field is None:
+            return None
+
+        origin_x, origin_y = self.origin
+        step = self.field.next_step(x - origin_x, y - origin_y)
+        return None if step is None else (step[0] + origin_x, step[1] + origin_y)
+
+
+class EndlessLevel(Level):
+    """Unbounded maze built from chunks as the player reaches them.
+
+    Chunk grids and built chunks are kept in two LRU caches and are
+    regenerated from the seed after eviction, so memory stays bounded
+    however far the player walks. Only the set of picked up coins grows.
+    """
+
+    def __init__(self, seed: int = None):
+        self.seed = seed if seed is not None else random.getrandbits(64)
+        self.rng = random.Random(self.seed)
+        self.load_tiles()
+
+        self.grids: OrderedDict[tuple[int, int], Grid] = OrderedDict()
+        self.chunks: OrderedDict[tuple[int, int], Chunk] = OrderedDict()
+        self.collected_coins: set[tuple[int, int]] = set()
+
+        # no fixed grid and no exit, the run lasts until a bat catches you
+        self.maze = None
+        self.start_pos = 0, 0
+        self.end_pos = None
+
+        self.tile_selections = ChunkTiles(self)
+        self.wall_index = ChunkIndex(self, "walls")
+        self.coins = ChunkCoins(self)
+
+        self.init_state()
+        self.flow_field = WindowFlowField(self)
+
+    def grid(self, chunk_x: int, chunk_y: int) -> Grid:
+        key = chunk_x, chunk_y
+        grid = self.grids.get(key)
+        if grid is None:
+            grid = generate_chunk(self.seed, chunk_x, chunk_y, st.CHUNK_SIZE)
+            self.grids[key] = grid
+            # grids are tiny, and neighbours need them to pick wall tiles
+            while len(self.grids) > st.CHUNK_CACHE * 4:
+                self.grids.popitem(last=False)
+        else:
+            self.grids.move_to_end(key)
+
+        return grid
+
+    def chunk(self, chunk_x: int, chunk_y: int) -> Chunk:
+        key = chunk_x, chunk_y
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = Chunk(self, chunk_x, chunk_y)
+            self.chunks[key] = chunk
+            while len(self.chunks) > st.CHUNK_CACHE:
+                self.chunks.popitem(last=False)
+        else:
+            self.chunks.move_to_end(key)
+
+        return chunk
+
+    def chunk_at(self, coord: tuple[int, int]) -> Chunk:
+        size = st.CHUNK_SIZE
+        return self.chunk(coord[0] // size, coord[1] // size)
+
+    def cell(self, x: int, y: int) -> int:
+        size = st.CHUNK_SIZE
+        return self.grid(x // size, y // size).get(x % size, y % size)
+
+    def get_random_pos(self):
+        # can only get random air tiles, in the chunks around the start
+        size = st.CHUNK_SIZE
+        while True:
+            x = self.rng.randrange(-size, size * 2)
+            y = self.rng.randrange(-size, size * 2)
+
+            if self.cell(x, y) == AIR:
+                return x, y
+
+    def get_grid(self):
+        raise TypeError("An endless level has no fixed grid, set ENDLESS = False")
+
+    def get_corridor_graph(self):
+        raise TypeError("An endless level has no fixed grid, set ENDLESS = False")
+
+
+def new_level(seed: int = None) -> Level:
+    # the endless chunked maze or one fixed maze, depending on settings.ENDLESS
+    return EndlessLevel(seed) if st.ENDLESS else Level(seed)